@@ -0,0 +1,125 @@
+"""
+性能基准
+
+基准函数用`benchmark`注册，返回指标字典；通过仓库根目录的`runbench.py`运行，
+在SQLite上运行，不依赖外部服务，结果以JSON输出，可以用`compare`比较两次提交的结果。
+基准使用`tests`中的模型，因此与`tests`一样放在仓库根目录，不随包发布。
+"""
+
+import platform
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import django
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+_registry = {}
+
+
+def benchmark(name):
+    """
+    注册基准函数
+
+    :param name: 基准名称
+    """
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def timeit(func, repeat=1):
+    """
+    计时
+
+    :param func: 被计时的函数
+    :param repeat: 重复次数
+    :return: 最短一次的耗时（秒）
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@contextmanager
+def rollback():
+    """
+    在事务中运行并回滚，基准之间互不影响
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(func):
+    """
+    计时并统计查询数量
+
+    :param func: 被测量的函数
+    :return: (耗时（秒）, 查询数量)
+    """
+    with CaptureQueriesContext(connection) as context:
+        elapsed = timeit(func)
+    return elapsed, len(context)
+
+
+def metadata():
+    """
+    运行环境信息
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def run(names=None):
+    """
+    运行基准
+
+    :param names: 基准名称列表，默认运行全部
+    :return: 包含运行环境和基准结果的字典
+    """
+    from . import ids, numbers, polymorphic, readme, serializers  # noqa: F401 注册基准
+
+    results = []
+    for name, func in _registry.items():
+        if names and name not in names:
+            continue
+        results.append({'name': name, 'metrics': func()})
+    return {'meta': metadata(), 'results': results}
+
+
+def compare(baseline, current):
+    """
+    比较两次运行的结果
+
+    :param baseline: 基线结果，`run`的返回值
+    :param current: 当前结果，`run`的返回值
+    :return: 基准名称到各指标（基线值, 当前值, 比值）的字典
+    """
+    baseline_metrics = {result['name']: result['metrics'] for result in baseline['results']}
+    comparison = {}
+    for result in current['results']:
+        before = baseline_metrics.get(result['name'], {})
+        comparison[result['name']] = {
+            metric: (before.get(metric), value, value / before[metric] if before.get(metric) else None)
+            for metric, value in result['metrics'].items()
+        }
+    return comparison
@@ -0,0 +1,76 @@
+"""
+ID字段基准
+
+比较uuid4与uuid7默认值的生成速度，以及在SQLite文件数据库上作为主键的插入吞吐量和索引大小。
+"""
+
+import os
+import sqlite3
+import tempfile
+import uuid
+
+from django_quanttide.models.fields import IDField, uuid7
+
+from . import benchmark, timeit
+
+ROWS = 100_000
+BATCH_SIZE = 1_000
+GENERATIONS = 100_000
+
+
+def _generate(field):
+    elapsed = timeit(lambda: [field.get_default() for _ in range(GENERATIONS)], repeat=3)
+    return {'ids_per_second': GENERATIONS / elapsed}
+
+
+@benchmark('id_default_uuid4')
+def bench_default_uuid4():
+    return _generate(IDField())
+
+
+@benchmark('id_default_uuid7')
+def bench_default_uuid7():
+    return _generate(IDField(time_ordered=True))
+
+
+def _insert(generator, rows=ROWS):
+    fd, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(path)
+        # 排除磁盘同步的影响，只比较索引维护的开销
+        connection.execute('PRAGMA synchronous = OFF')
+        # 与Django在SQLite上为UUIDField主键生成的列定义一致
+        connection.execute('CREATE TABLE bench (id char(32) NOT NULL PRIMARY KEY, number integer NOT NULL)')
+
+        def insert():
+            for start in range(0, rows, BATCH_SIZE):
+                connection.executemany(
+                    'INSERT INTO bench (id, number) VALUES (?, ?)',
+                    [(generator().hex, number) for number in range(start, start + BATCH_SIZE)],
+                )
+                connection.commit()
+
+        elapsed = timeit(insert)
+        index_bytes, unused_bytes = connection.execute(
+            "SELECT SUM(pgsize), SUM(unused) FROM dbstat WHERE name LIKE 'sqlite_autoindex_bench%'"
+        ).fetchone()
+        connection.close()
+        return {
+            'rows_per_second': rows / elapsed,
+            'index_bytes': index_bytes,
+            'index_unused_bytes': unused_bytes,
+            'file_bytes': os.path.getsize(path),
+        }
+    finally:
+        os.remove(path)
+
+
+@benchmark('id_insert_uuid4')
+def bench_insert_uuid4():
+    return _insert(uuid.uuid4)
+
+
+@benchmark('id_insert_uuid7')
+def bench_insert_uuid7():
+    return _insert(uuid7)
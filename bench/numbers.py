@@ -0,0 +1,37 @@
+"""
+编号字段基准
+
+测量不同数据量下逐条保存时的编号分配开销，以及`bulk_create`批量写入`ExampleModel`的吞吐量。
+需要在仓库根目录下通过`runbench.py`运行。
+"""
+
+from . import benchmark, measure, rollback
+
+TABLE_SIZES = (0, 1_000, 10_000)
+INSERTS = 200
+BULK_ROWS = 1_000
+
+
+@benchmark('number_allocation')
+def bench_number_allocation():
+    from tests.models import ExampleNumberModel
+
+    metrics = {}
+    for size in TABLE_SIZES:
+        with rollback():
+            ExampleNumberModel.objects.bulk_create([ExampleNumberModel() for _ in range(size)])
+            elapsed, queries = measure(lambda: [ExampleNumberModel.objects.create() for _ in range(INSERTS)])
+        metrics[f'inserts_per_second_at_{size}'] = INSERTS / elapsed
+        metrics[f'queries_per_insert_at_{size}'] = queries / INSERTS
+    return metrics
+
+
+@benchmark('bulk_create_example_model')
+def bench_bulk_create_example_model():
+    from tests.models import ExampleModel
+
+    with rollback():
+        elapsed, queries = measure(lambda: ExampleModel.objects.bulk_create(
+            [ExampleModel(name=f'example-{index}', title='Example Model') for index in range(BULK_ROWS)]
+        ))
+    return {'rows_per_second': BULK_ROWS / elapsed, 'queries': queries}
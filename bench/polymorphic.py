@@ -0,0 +1,27 @@
+"""
+多态模型基准
+
+测量混合类型列表的整体读取和分块流式读取。需要在仓库根目录下通过`runbench.py`运行。
+"""
+
+from . import benchmark, measure, rollback
+
+ROWS = 1_000
+
+
+@benchmark('polymorphic_list_fetch')
+def bench_polymorphic_list_fetch():
+    from tests.models import ParentModel, ChildModel
+
+    with rollback():
+        ParentModel.objects.bulk_create([ParentModel() for _ in range(ROWS // 2)])
+        for _ in range(ROWS // 2):
+            ChildModel.objects.create()
+        list_elapsed, list_queries = measure(lambda: list(ParentModel.objects.all()))
+        stream_elapsed, stream_queries = measure(lambda: list(ParentModel.objects.stream(chunk_size=500)))
+    return {
+        'list_rows_per_second': ROWS / list_elapsed,
+        'list_queries': list_queries,
+        'stream_rows_per_second': ROWS / stream_elapsed,
+        'stream_queries': stream_queries,
+    }
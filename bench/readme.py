@@ -0,0 +1,105 @@
+"""
+简介字段压缩基准
+
+在生成的Markdown文档上比较各压缩编码节省的字节数与压缩、解压的CPU开销。
+文档由固定随机种子生成，包含标题、段落、列表、表格和代码块，长度从1KB到64KB不等。
+"""
+
+import random
+
+from django_quanttide.models.compression import get_codec, encode, decode
+
+from . import benchmark, timeit
+
+DOCUMENTS = 200
+SEED = 20240101
+THRESHOLD = 256
+
+_WORDS = (
+    'model field query index table column serializer manager request response cache migration '
+    'database record number status stage type name title description readme version release '
+    'install configure deploy service user permission token page cursor list detail create update '
+    'delete the a of to and in for with on by is are be this that from as it'
+).split()
+
+
+def _sentence(rng):
+    words = rng.choices(_WORDS, k=rng.randint(6, 18))
+    return ' '.join(words).capitalize() + '.'
+
+
+def _section(rng):
+    lines = [f'## {" ".join(rng.choices(_WORDS, k=3)).title()}', '']
+    lines.append(' '.join(_sentence(rng) for _ in range(rng.randint(2, 6))))
+    lines.append('')
+    kind = rng.randrange(3)
+    if kind == 0:
+        lines.extend(f'- `{rng.choice(_WORDS)}`: {_sentence(rng)}' for _ in range(rng.randint(3, 8)))
+    elif kind == 1:
+        lines.append('| 名称 | 类型 | 说明 |')
+        lines.append('| --- | --- | --- |')
+        lines.extend(
+            f'| {rng.choice(_WORDS)} | {rng.choice(_WORDS)} | {_sentence(rng)} |' for _ in range(rng.randint(3, 8))
+        )
+    else:
+        lines.append('```python')
+        lines.extend(
+            f'{rng.choice(_WORDS)} = {rng.choice(_WORDS)}.{rng.choice(_WORDS)}({rng.randint(0, 999)})'
+            for _ in range(rng.randint(3, 10))
+        )
+        lines.append('```')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def documents(count=DOCUMENTS, seed=SEED):
+    """
+    生成Markdown文档
+
+    :param count: 文档数量
+    :param seed: 随机种子
+    :return: 文档列表
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        size = rng.choice((1, 4, 16, 64)) * 1024
+        parts = [f'# {rng.choice(_WORDS).title()}\n']
+        while sum(len(part) for part in parts) < size:
+            parts.append(_section(rng))
+        result.append('\n'.join(parts))
+    return result
+
+
+def _bench_codec(name):
+    codec = get_codec(name)
+    docs = documents()
+    raw_bytes = sum(len(doc.encode()) for doc in docs)
+    encoded = [encode(doc, codec, THRESHOLD) for doc in docs]
+    stored_bytes = sum(len(data) for data in encoded)
+    encode_seconds = timeit(lambda: [encode(doc, codec, THRESHOLD) for doc in docs], repeat=3)
+    decode_seconds = timeit(lambda: [decode(data) for data in encoded], repeat=3)
+    megabytes = raw_bytes / 1024 / 1024
+    return {
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'bytes_saved': raw_bytes - stored_bytes,
+        'ratio': stored_bytes / raw_bytes,
+        'encode_mb_per_second': megabytes / encode_seconds,
+        'decode_mb_per_second': megabytes / decode_seconds,
+    }
+
+
+@benchmark('readme_zlib')
+def bench_readme_zlib():
+    return _bench_codec('zlib')
+
+
+@benchmark('readme_bz2')
+def bench_readme_bz2():
+    return _bench_codec('bz2')
+
+
+@benchmark('readme_lzma')
+def bench_readme_lzma():
+    return _bench_codec('lzma')
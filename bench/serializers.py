@@ -0,0 +1,32 @@
+"""
+多态序列化器基准
+
+比较rest_polymorphic的序列化器与`django_quanttide.serializers.polymorphic.PolymorphicSerializer`
+渲染一万行混合类型数据的耗时。需要在仓库根目录下通过`runbench.py`运行。
+"""
+
+from . import benchmark, timeit
+
+ROWS = 10_000
+
+
+def _render(serializer_class):
+    from tests.models import ParentModel, ChildModel
+
+    instances = [ChildModel() if index % 2 else ParentModel() for index in range(ROWS)]
+    elapsed = timeit(lambda: serializer_class(instances, many=True).data, repeat=3)
+    return {'rows_per_second': ROWS / elapsed, 'seconds': elapsed}
+
+
+@benchmark('polymorphic_serializer_base')
+def bench_polymorphic_serializer_base():
+    from tests.serializers import BaseExamplePolymorphicSerializer
+
+    return _render(BaseExamplePolymorphicSerializer)
+
+
+@benchmark('polymorphic_serializer')
+def bench_polymorphic_serializer():
+    from tests.serializers import ExamplePolymorphicSerializer
+
+    return _render(ExamplePolymorphicSerializer)
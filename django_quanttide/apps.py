@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class DjangoPackageConfig(AppConfig):
     name = 'django_quanttide'
+
+    def ready(self):
+        from .instrumentation import setup
+
+        # 按配置安装查询统计，参见`django_quanttide.instrumentation`
+        setup()
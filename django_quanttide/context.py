@@ -0,0 +1,37 @@
+"""
+请求上下文
+
+记录当前请求的用户，由`django_quanttide.middleware.AuditUserMiddleware`设置，
+模型字段和其他模块只依赖本模块读取，不依赖中间件。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_user = ContextVar('django_quanttide_current_user', default=None)
+
+
+def get_current_user():
+    """
+    获取当前请求的用户
+
+    :return: 当前请求的用户，不在请求中或未登录时为None
+    """
+    user = _current_user.get()
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+@contextmanager
+def current_user(user):
+    """
+    在上下文中设置当前请求的用户
+
+    :param user: 用户，可以为None或匿名用户
+    """
+    token = _current_user.set(user)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
@@ -0,0 +1,166 @@
+"""
+查询统计
+
+设置`QUANTTIDE_QUERY_INSTRUMENTATION = True`后，`DjangoPackageConfig.ready()`在每个数据库连接上安装`execute_wrapper`，
+配合`django_quanttide.middleware.QueryInstrumentationMiddleware`统计每个请求的查询数量和耗时，
+并按SQL涉及的数据表归到模型，包括`NumberField`分配编号和`PolymorphicModel.type`查询ContentType等内部查询。
+一条查询涉及多个模型时计入每个模型。
+
+统计结果写入`Server-Timing`响应头和`django_quanttide.queries`日志，
+并传给`QUANTTIDE_QUERY_METRICS_HOOK`配置的函数，参数为`(request, response, stats)`。
+
+未开启时不安装包装函数，中间件抛出`MiddlewareNotUsed`，没有额外开销；
+开启后不在请求中的查询只多一次上下文变量读取。
+"""
+
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import import_string
+
+_current_stats = ContextVar('django_quanttide_query_stats', default=None)
+
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+[`"\[]?([\w$]+)', re.IGNORECASE)
+
+
+def is_enabled() -> bool:
+    """
+    是否开启查询统计
+
+    :return: `QUANTTIDE_QUERY_INSTRUMENTATION`配置项，默认为False
+    """
+    return getattr(settings, 'QUANTTIDE_QUERY_INSTRUMENTATION', False)
+
+
+def get_metrics_hook():
+    """
+    获取指标回调函数
+
+    :return: `QUANTTIDE_QUERY_METRICS_HOOK`配置的函数，未配置时为None
+    """
+    path = getattr(settings, 'QUANTTIDE_QUERY_METRICS_HOOK', None)
+    return import_string(path) if path else None
+
+
+class QueryStats:
+    """
+    查询统计结果
+
+    :param count: 查询数量
+    :param seconds: 查询耗时（秒）
+    :param models: 模型标签到[查询数量, 查询耗时]的字典
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.models = defaultdict(lambda: [0, 0.0])
+
+    def add(self, labels, seconds):
+        self.count += 1
+        self.seconds += seconds
+        for label in labels:
+            entry = self.models[label]
+            entry[0] += 1
+            entry[1] += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.count,
+            'query_ms': round(self.seconds * 1000, 3),
+            'models': {
+                label: {'queries': count, 'query_ms': round(seconds * 1000, 3)}
+                for label, (count, seconds) in self.models.items()
+            },
+        }
+
+    def server_timing(self) -> str:
+        """
+        `Server-Timing`响应头的值
+
+        :return: 总计和每个模型的查询耗时（毫秒）
+        """
+        metrics = [f'db;dur={self.seconds * 1000:.3f};desc="{self.count} queries"']
+        for label, (count, seconds) in sorted(self.models.items(), key=lambda item: -item[1][1]):
+            metrics.append(f'db.{label.lower()};dur={seconds * 1000:.3f};desc="{count} queries"')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def record_queries():
+    """
+    在上下文中统计查询
+
+    :return: `QueryStats`
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@lru_cache(maxsize=None)
+def _table_models():
+    return {model._meta.db_table: model._meta.label for model in apps.get_models(include_auto_created=True)}
+
+
+@lru_cache(maxsize=4096)
+def query_models(sql) -> tuple:
+    """
+    SQL涉及的模型
+
+    :param sql: SQL语句
+    :return: 模型标签元组，按在SQL中出现的顺序排列
+    """
+    tables = _table_models()
+    labels = (tables.get(table) for table in _TABLE_RE.findall(sql))
+    return tuple(dict.fromkeys(label for label in labels if label is not None))
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+    数据库连接的查询包装函数，参见`connection.execute_wrapper`
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(query_models(sql), time.perf_counter() - start)
+
+
+def install(connection):
+    """
+    在数据库连接上安装查询包装函数
+
+    :param connection: 数据库连接
+    """
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def _install_on_connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+def setup():
+    """
+    开启查询统计时在所有数据库连接上安装查询包装函数，由`DjangoPackageConfig.ready()`调用
+    """
+    if not is_enabled():
+        return
+    connection_created.connect(_install_on_connection_created, dispatch_uid='django_quanttide.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        install(connection)
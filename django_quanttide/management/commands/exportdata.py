@@ -0,0 +1,44 @@
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_quanttide.streaming import FORMATS, export
+
+
+class Command(BaseCommand):
+    help = '流式导出模型数据为NDJSON或CSV，内存占用与行数无关。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='模型，格式为"<应用标签>.<模型名>"')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson', help='导出格式，默认为ndjson')
+        parser.add_argument('--output', '-o', help='输出文件，默认为标准输出')
+        parser.add_argument('--fields', help='逗号分隔的字段名，默认为全部具体字段')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='每次从数据库读取的行数')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='数据库别名')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        fields = options['fields'].split(',') if options['fields'] else None
+        if fields is not None:
+            try:
+                model_fields = [model._meta.get_field(name) for name in fields]
+            except FieldDoesNotExist as e:
+                raise CommandError(str(e))
+            # 反向关联和多对多字段没有对应的列
+            invalid = [field.name for field in model_fields if not field.concrete]
+            if invalid:
+                raise CommandError(f'{model._meta.label} has no column for field(s): {", ".join(invalid)}.')
+        queryset = model._base_manager.using(options['database'])
+        if options['output']:
+            # CSV写入器自行处理换行
+            with open(options['output'], 'w', encoding='utf-8', newline='') as stream:
+                count = export(queryset, stream, options['format'], fields, options['chunk_size'])
+        else:
+            # 行尾由导出函数写入
+            self.stdout.ending = ''
+            count = export(queryset, self.stdout, options['format'], fields, options['chunk_size'])
+        self.stderr.write(f'Exported {count} rows of {model._meta.label}.')
@@ -0,0 +1,48 @@
+import sys
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_quanttide.streaming import FORMATS, load
+
+
+class Command(BaseCommand):
+    help = '流式导入NDJSON或CSV数据，分块批量写入并报告速度。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='模型，格式为"<应用标签>.<模型名>"')
+        parser.add_argument('input', help='输入文件，"-"为标准输入')
+        parser.add_argument('--format', choices=FORMATS, help='导入格式，默认按文件扩展名判断，其他情况为ndjson')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每个事务写入的行数')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='数据库别名')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        path = options['input']
+        format = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        kwargs = {
+            'batch_size': options['batch_size'],
+            'using': options['database'],
+            'progress': self.report,
+        }
+        try:
+            if path == '-':
+                result = load(model, sys.stdin, format, **kwargs)
+            else:
+                # CSV读取器自行处理换行
+                with open(path, encoding='utf-8', newline='') as stream:
+                    result = load(model, stream, format, **kwargs)
+        except (FieldDoesNotExist, ValidationError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stderr.write(
+            f'Imported {result.rows} rows of {model._meta.label} in {result.seconds:.1f}s '
+            f'({result.rows_per_second:.0f} rows/s).'
+        )
+
+    def report(self, progress):
+        self.stderr.write(f'{progress.rows} rows, {progress.rows_per_second:.0f} rows/s')
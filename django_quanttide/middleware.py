@@ -0,0 +1,60 @@
+"""
+中间件
+"""
+
+import logging
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from .context import current_user, get_current_user
+from .instrumentation import is_enabled, get_metrics_hook, record_queries
+
+
+class AuditUserMiddleware:
+    """
+    审计用户中间件
+
+    在请求期间记录`request.user`，保存模型时`CreatedByField`和`UpdatedByField`据此自动填充，
+    直接使用已加载用户的主键，不额外查询用户表。需放在`AuthenticationMiddleware`之后。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with current_user(getattr(request, 'user', None)):
+            return self.get_response(request)
+
+
+logger = logging.getLogger('django_quanttide.queries')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    查询统计中间件
+
+    统计每个请求的查询数量和耗时并按模型归类，写入`Server-Timing`响应头和`django_quanttide.queries`日志，
+    再传给`QUANTTIDE_QUERY_METRICS_HOOK`配置的函数，参见`django_quanttide.instrumentation`。
+    未设置`QUANTTIDE_QUERY_INSTRUMENTATION = True`时不启用。
+    """
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.metrics_hook = get_metrics_hook()
+
+    def __call__(self, request):
+        with record_queries() as stats:
+            response = self.get_response(request)
+        timing = stats.server_timing()
+        if response.has_header('Server-Timing'):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response['Server-Timing'] = timing
+        logger.info(
+            '%s %s: %d queries in %.1fms', request.method, request.path, stats.count, stats.seconds * 1000,
+            extra={'method': request.method, 'path': request.path, 'status': response.status_code, **stats.as_dict()},
+        )
+        if self.metrics_hook is not None:
+            self.metrics_hook(request, response, stats)
+        return response
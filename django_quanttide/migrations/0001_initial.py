@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='序列标识')),
+                ('value', models.BigIntegerField(default=0, verbose_name='当前编号')),
+            ],
+            options={
+                'verbose_name': '编号序列',
+                'verbose_name_plural': '编号序列列表',
+            },
+        ),
+    ]
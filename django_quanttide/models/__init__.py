@@ -4,17 +4,20 @@
 
 from .choices import StageChoices
 from .fields import (
-    IDField, NumberField, NameField,
+    IDField, uuid7, NumberField, NameField,
     VerboseNameField, TitleField, DescriptionField, ReadmeField,
     TypeField, StatusField, StageField,
     CreatedAtField, UpdatedAtField,
     CreatedByField, UpdatedByField,
 )
+from .indexes import keyset_index, polymorphic_type_index
+from .managers import QuerySet, Manager, PolymorphicQuerySet, PolymorphicManager
 from .models import Model
+from .sequences import NumberSequence
 from .polymorphic import PolymorphicModel
 
 __all__ = [
-    'Model', 'IDField',
+    'Model', 'IDField', 'uuid7',
     'NumberField',
     'NameField',
     'VerboseNameField',
@@ -29,4 +32,11 @@ __all__ = [
     'UpdatedAtField',
     'CreatedByField',
     'UpdatedByField',
+    'NumberSequence',
+    'QuerySet',
+    'Manager',
+    'PolymorphicQuerySet',
+    'PolymorphicManager',
+    'keyset_index',
+    'polymorphic_type_index',
 ]
@@ -0,0 +1,389 @@
+"""
+缓存
+
+缓存存放在Django缓存框架中，可以通过`QUANTTIDE_CACHE_ALIAS`配置项指定缓存别名，默认为'default'。
+
+标识缓存：`NameField(cached=True)`的标识到主键的映射，标识变化或实例删除时由`post_save`和`post_delete`信号失效，
+失效在写入时和事务提交后各执行一次。
+通过`get_by_name`取得的实例总会核对标识，绕过信号的修改（如`QuerySet.update`）不会返回错误的实例；
+只解析主键的`resolve_name`在这种情况下可能返回过期的主键，直到缓存过期。
+
+对象缓存：`cached_get`和`cached_in_bulk`按主键读取实例，未命中的主键用一次`IN`查询补全。
+对象缓存需要在模型的管理器上设置`object_cached = True`启用，未启用的模型保存、删除和批量更新时不访问缓存。
+每个条目记录写入时读到的两个版本号，读取时与当前版本号比较，不一致即视为未命中：
+
+- 实例版本号：每次保存或删除实例后更换，多表继承的整个层级共用；
+- 模型版本号：`QuerySet.update`等绕过信号的批量写入后更换。
+
+版本号在写入时和事务提交后各更换一次，事务期间读到旧数据的并发请求写入的条目不会被使用。
+写入条目前缺少的版本号先用`add`设为新的随机值，条目记录的版本号总是非空；
+版本号被缓存淘汰后再次读取时同样设为新的随机值，与条目不一致，只会多一次查询，不会返回过期数据。
+"""
+
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models.signals import class_prepared, post_init, post_save, post_delete
+from django.dispatch import receiver
+
+
+def get_cache():
+    """
+    获取缓存
+
+    :return: `QUANTTIDE_CACHE_ALIAS`配置的缓存，默认为'default'
+    """
+    return caches[getattr(settings, 'QUANTTIDE_CACHE_ALIAS', 'default')]
+
+
+def name_field(model):
+    """
+    查找模型的标识字段
+
+    :param model: 模型类
+    :return: 第一个`NameField`
+    """
+    from .fields import NameField
+
+    for field in model._meta.concrete_fields:
+        if isinstance(field, NameField):
+            return field
+    raise FieldDoesNotExist(f'{model._meta.label} has no NameField.')
+
+
+def name_cache_key(field, name) -> str:
+    """
+    标识的缓存键
+
+    以定义字段的模型区分，多表继承的子类与父类共用缓存。
+
+    :param field: 标识字段
+    :param name: 标识
+    :return: 缓存键
+    """
+    return f'quanttide:name:{field.model._meta.label_lower}:{field.attname}:{name}'
+
+
+def _cached_pks(field, names) -> dict:
+    if not field.cached:
+        return {}
+    keys = {name_cache_key(field, name): name for name in names}
+    return {keys[key]: pk for key, pk in get_cache().get_many(list(keys)).items()}
+
+
+def _cache_pks(field, pks: dict):
+    if field.cached and pks:
+        get_cache().set_many({name_cache_key(field, name): pk for name, pk in pks.items()})
+
+
+def resolve_names(queryset, names) -> dict:
+    """
+    批量解析标识对应的主键
+
+    先批量读取缓存，未命中的标识用一次查询补全并写入缓存。
+    缓存不区分查询集，查询集有过滤条件时不读取缓存，直接查询，不返回被过滤的主键。
+
+    :param queryset: 查询集
+    :param names: 标识列表
+    :return: 标识到主键的字典，不存在的标识不在字典中
+    """
+    field = name_field(queryset.model)
+    names = list(dict.fromkeys(names))
+    resolved = {} if queryset.query.has_filters() else _cached_pks(field, names)
+    missing = [name for name in names if name not in resolved]
+    if missing:
+        found = dict(queryset.filter(**{f'{field.attname}__in': missing}).values_list(field.attname, 'pk'))
+        _cache_pks(field, found)
+        resolved.update(found)
+    return resolved
+
+
+def resolve_name(queryset, name):
+    """
+    解析标识对应的主键
+
+    :param queryset: 查询集
+    :param name: 标识
+    :return: 主键
+    :raises DoesNotExist: 标识不存在
+    """
+    try:
+        return resolve_names(queryset, [name])[name]
+    except KeyError:
+        raise queryset.model.DoesNotExist(
+            f'{queryset.model._meta.object_name} matching name {name!r} does not exist.'
+        ) from None
+
+
+def get_many_by_name(queryset, names) -> dict:
+    """
+    按标识批量查询实例
+
+    命中缓存的标识按主键批量读取（查询集未过滤时使用对象缓存）并核对标识，其余标识用一次查询按标识查询并写入缓存。
+
+    :param queryset: 查询集
+    :param names: 标识列表
+    :return: 标识到实例的字典，不存在的标识不在字典中
+    """
+    field = name_field(queryset.model)
+    names = list(dict.fromkeys(names))
+    result = {}
+    pks = _cached_pks(field, names)
+    if pks:
+        if queryset.query.has_filters() or not object_cache_enabled(queryset.model):
+            objects = queryset.in_bulk(list(pks.values()))
+        else:
+            objects = cached_in_bulk(queryset, pks.values())
+        for name, pk in pks.items():
+            obj = objects.get(pk)
+            if obj is not None and getattr(obj, field.attname) == name:
+                result[name] = obj
+    # 未命中、缓存过期或实例被过滤的标识
+    missing = [name for name in names if name not in result]
+    if missing:
+        found = {getattr(obj, field.attname): obj for obj in queryset.filter(**{f'{field.attname}__in': missing})}
+        _cache_pks(field, {name: obj.pk for name, obj in found.items()})
+        stale = [name for name in missing if name in pks and name not in found]
+        if stale:
+            get_cache().delete_many([name_cache_key(field, name) for name in stale])
+        result.update(found)
+    return result
+
+
+def get_by_name(queryset, name):
+    """
+    按标识查询实例
+
+    :param queryset: 查询集
+    :param name: 标识
+    :return: 实例
+    :raises DoesNotExist: 标识不存在
+    """
+    try:
+        return get_many_by_name(queryset, [name])[name]
+    except KeyError:
+        raise queryset.model.DoesNotExist(
+            f'{queryset.model._meta.object_name} matching name {name!r} does not exist.'
+        ) from None
+
+
+# 对象缓存的命中和未命中次数，键为"<模型标签>.hits"和"<模型标签>.misses"
+object_cache_stats = Counter()
+
+
+def cache_stats(model=None) -> dict:
+    """
+    对象缓存的命中统计
+
+    :param model: 模型类，默认统计全部模型
+    :return: 包含`hits`和`misses`的字典
+    """
+    stats = {'hits': 0, 'misses': 0}
+    prefix = f'{model._meta.label}.' if model is not None else ''
+    for key, count in object_cache_stats.items():
+        if key.startswith(prefix):
+            stats[key.rsplit('.', 1)[1]] += count
+    return stats
+
+
+def reset_cache_stats():
+    """
+    清空对象缓存的命中统计
+    """
+    object_cache_stats.clear()
+
+
+def _root_model(model):
+    model = model._meta.concrete_model
+    parents = model._meta.get_parent_list()
+    return parents[-1] if parents else model
+
+
+def object_cache_key(model, using, pk) -> str:
+    """
+    实例的缓存键
+
+    :param model: 查询的模型类，多态查询缓存的是子类实例
+    :param using: 数据库别名
+    :param pk: 主键
+    :return: 缓存键
+    """
+    return f'quanttide:object:{using}:{model._meta.label_lower}:{pk}'
+
+
+def _version_key(model, using, pk):
+    return f'quanttide:version:{using}:{_root_model(model)._meta.label_lower}:{pk}'
+
+
+def _generation_key(model, using):
+    return f'quanttide:generation:{using}:{_root_model(model)._meta.label_lower}'
+
+
+def _touch(keys, using):
+    # 立即更换版本号，提交后再更换一次
+    def touch():
+        get_cache().set_many({key: uuid.uuid4().hex for key in keys})
+
+    touch()
+    transaction.on_commit(touch, using=using)
+
+
+# 启用对象缓存的模型，包括启用模型的父类和子类，以及它们的代理模型
+_object_cached_models = set()
+
+
+def object_cache_enabled(model) -> bool:
+    """
+    模型是否启用对象缓存
+
+    :param model: 模型类
+    :return: 模型或其多表继承层级中的模型在管理器上设置了`object_cached = True`时为True
+    """
+    return model in _object_cached_models
+
+
+def touch_model(model, using):
+    """
+    使模型（包括多表继承的整个层级）的全部对象缓存失效
+
+    :param model: 模型类
+    :param using: 数据库别名
+    """
+    _touch([_generation_key(model, using)], using)
+
+
+def _ensure_versions(cache, values, keys) -> dict:
+    # 缺少的版本号设为新的随机值，并发写入时以先写入的为准
+    absent = [key for key in keys if values.get(key) is None]
+    if not absent:
+        return values
+    for key in absent:
+        cache.add(key, uuid.uuid4().hex)
+    return {**values, **cache.get_many(absent)}
+
+
+def cached_in_bulk(queryset, pks) -> dict:
+    """
+    按主键批量读取实例，优先使用对象缓存
+
+    一次读取缓存，未命中的主键用一次查询补全并写入缓存。缓存的实例包括延迟加载的大字段。
+
+    :param queryset: 未过滤、未切片的查询集
+    :param pks: 主键列表
+    :return: 主键到实例的字典，按`pks`的顺序排列，不存在的主键不在字典中
+    """
+    if queryset.query.is_sliced or queryset.query.has_filters():
+        raise TypeError('Cannot use cached_in_bulk() on a filtered or sliced queryset.')
+    model, using = queryset.model, queryset.db
+    if not object_cache_enabled(model):
+        raise TypeError(f'{model._meta.label} does not enable the object cache, set object_cached = True on its manager.')
+    pk_field = model._meta.pk
+    pks = list(dict.fromkeys(pk_field.to_python(pk) for pk in pks))
+    if not pks:
+        return {}
+    cache = get_cache()
+    generation_key = _generation_key(model, using)
+    object_keys = {pk: object_cache_key(model, using, pk) for pk in pks}
+    version_keys = {pk: _version_key(model, using, pk) for pk in pks}
+    values = cache.get_many([generation_key, *object_keys.values(), *version_keys.values()])
+    generation = values.get(generation_key)
+    found = {}
+    missing = []
+    for pk in pks:
+        entry = values.get(object_keys[pk])
+        if entry is not None and entry[0] == generation and entry[1] == values.get(version_keys[pk]):
+            found[pk] = entry[2]
+        else:
+            missing.append(pk)
+    label = model._meta.label
+    object_cache_stats[f'{label}.hits'] += len(found)
+    object_cache_stats[f'{label}.misses'] += len(missing)
+    if missing:
+        objects = queryset.with_large_fields().in_bulk(missing)
+        if objects:
+            versions = _ensure_versions(cache, values, [generation_key, *(version_keys[pk] for pk in objects)])
+            cache.set_many({
+                object_keys[pk]: (versions[generation_key], versions[version_keys[pk]], obj)
+                for pk, obj in objects.items()
+            })
+        found.update(objects)
+    return {pk: found[pk] for pk in pks if pk in found}
+
+
+def cached_get(queryset, pk):
+    """
+    按主键读取实例，优先使用对象缓存
+
+    :param queryset: 未过滤、未切片的查询集
+    :param pk: 主键
+    :return: 实例
+    :raises DoesNotExist: 实例不存在
+    """
+    try:
+        return next(iter(cached_in_bulk(queryset, [pk]).values()))
+    except StopIteration:
+        raise queryset.model.DoesNotExist(
+            f'{queryset.model._meta.object_name} matching pk {pk!r} does not exist.'
+        ) from None
+
+
+def _touch_object(sender, instance, using, **kwargs):
+    _touch([_version_key(sender, using, instance.pk)], using)
+
+
+# 模型到缓存标识字段的映射
+_cached_name_fields = {}
+
+
+def _remember_name(sender, instance, **kwargs):
+    field = _cached_name_fields[sender]
+    # 延迟加载时实例中没有标识
+    instance._state.cached_name = instance.__dict__.get(field.attname)
+
+
+def _invalidate_name(sender, instance, **kwargs):
+    field = _cached_name_fields[sender]
+    original = getattr(instance._state, 'cached_name', None)
+    current = instance.__dict__.get(field.attname)
+    stale = {original, current} if kwargs.get('signal') is post_delete else {original} - {current}
+    stale.discard(None)
+    if stale:
+        keys = [name_cache_key(field, name) for name in stale]
+
+        # 立即删除，提交后再删除一次，事务期间并发请求缓存的旧标识不会保留
+        def delete():
+            get_cache().delete_many(keys)
+
+        delete()
+        transaction.on_commit(delete, using=kwargs['using'])
+    instance._state.cached_name = current
+
+
+@receiver(class_prepared)
+def _connect_caches(sender, **kwargs):
+    # 逐个模型连接信号，包括多表继承的子类和代理模型
+    parents = sender._meta.get_parent_list()
+    if (
+        any(getattr(manager, 'object_cached', False) for manager in sender._meta.managers)
+        or any(object_cache_enabled(parent) for parent in parents)
+    ):
+        # 父类的写入同样修改子类实例的数据
+        for model in [sender, *parents]:
+            if not object_cache_enabled(model):
+                _object_cached_models.add(model)
+                post_save.connect(_touch_object, sender=model, weak=False)
+                post_delete.connect(_touch_object, sender=model, weak=False)
+    try:
+        field = name_field(sender)
+    except FieldDoesNotExist:
+        return
+    if not field.cached:
+        return
+    _cached_name_fields[sender] = field
+    post_init.connect(_remember_name, sender=sender, weak=False)
+    post_save.connect(_invalidate_name, sender=sender, weak=False)
+    post_delete.connect(_invalidate_name, sender=sender, weak=False)
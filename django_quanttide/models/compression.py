@@ -0,0 +1,97 @@
+"""
+压缩编码
+
+`ReadmeField(compressed=True)`以二进制存储文本，首字节为编码标识：0表示UTF-8原文，其他值对应注册的压缩编码。
+编码标识随数据保存，更换字段的`codec`后旧数据仍能按原编码解压。
+
+内置`zlib`、`bz2`和`lzma`编码，可以用`register_codec`注册其他编码。
+"""
+
+import bz2
+import lzma
+import zlib
+from collections import namedtuple
+
+Codec = namedtuple('Codec', ['name', 'code', 'compress', 'decompress'])
+
+# 原文的编码标识
+RAW = 0
+
+_codecs_by_name = {}
+_codecs_by_code = {}
+
+
+def register_codec(name, code, compress, decompress):
+    """
+    注册压缩编码
+
+    :param name: 编码名称，即`ReadmeField`的`codec`参数
+    :param code: 编码标识，1~255，写入每个值的首字节，注册后不应再修改
+    :param compress: 压缩函数，参数和返回值均为bytes
+    :param decompress: 解压函数，参数和返回值均为bytes
+    """
+    if not 0 < code < 256:
+        raise ValueError(f'Codec code must be between 1 and 255, got {code}.')
+    existing = _codecs_by_code.get(code)
+    if existing is not None and existing.name != name:
+        raise ValueError(f'Codec code {code} is already registered by {existing.name!r}.')
+    codec = Codec(name, code, compress, decompress)
+    _codecs_by_name[name] = codec
+    _codecs_by_code[code] = codec
+
+
+def get_codec(name) -> Codec:
+    """
+    按名称获取压缩编码
+
+    :param name: 编码名称
+    :return: 压缩编码
+    """
+    try:
+        return _codecs_by_name[name]
+    except KeyError:
+        raise ValueError(f'Unknown codec {name!r}.') from None
+
+
+def encode(value: str, codec: Codec, threshold: int) -> bytes:
+    """
+    编码文本
+
+    UTF-8编码后不足`threshold`字节，或压缩后没有变小时保存原文。
+
+    :param value: 文本
+    :param codec: 压缩编码
+    :param threshold: 压缩的最小字节数
+    :return: 带编码标识的二进制数据
+    """
+    data = value.encode()
+    if len(data) >= threshold:
+        compressed = codec.compress(data)
+        if len(compressed) < len(data):
+            return bytes([codec.code]) + compressed
+    return bytes([RAW]) + data
+
+
+def decode(data: bytes) -> str:
+    """
+    解码二进制数据
+
+    :param data: `encode`的返回值
+    :return: 文本
+    """
+    data = bytes(data)
+    if not data:
+        return ''
+    code, payload = data[0], data[1:]
+    if code == RAW:
+        return payload.decode()
+    try:
+        codec = _codecs_by_code[code]
+    except KeyError:
+        raise ValueError(f'Unknown codec code {code}.') from None
+    return codec.decompress(payload).decode()
+
+
+register_codec('zlib', 1, zlib.compress, zlib.decompress)
+register_codec('bz2', 2, bz2.compress, bz2.decompress)
+register_codec('lzma', 3, lzma.compress, lzma.decompress)
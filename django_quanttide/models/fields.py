@@ -2,10 +2,43 @@
 数据模型字段
 """
 
+import os
+import time
 import uuid
-
-from django.db import models
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import EmptyResultSet, FieldError
+from django.db import models, router, connections
+from django.db.models import lookups
+from django.db.models.query_utils import DeferredAttribute
 from django.contrib.auth import get_user_model
+from django.utils.encoding import force_str
+
+from ..context import get_current_user
+from .compression import get_codec, encode, decode
+from .sequences import get_number_allocator
+
+
+def uuid7() -> uuid.UUID:
+    """
+    生成时间有序的UUID
+
+    遵循RFC 9562对UUIDv7的定义：前48位为Unix毫秒时间戳，其余为版本号、变体和随机数。
+    新值按时间递增，作为主键插入时集中在B树索引的末端。
+
+    :return: UUIDv7
+    """
+    timestamp = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (timestamp & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= (rand >> 62 & 0xFFF) << 64
+    value |= 0b10 << 62
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
 
 
 class IDField(models.UUIDField):
@@ -18,23 +51,33 @@ class IDField(models.UUIDField):
     不作为主键、作为关联ID使用时，设置`primary_key=False`，
     同时建议自定义`verbose_name`，格式为"<关联模型名称>ID"。
 
+    MySQL、SQLite等没有原生UUID类型的数据库默认以32位十六进制字符串存储，
+    设置`binary=True`后改为16字节二进制存储，索引和关联查询的体积减半；
+    已有数据的字段可以使用`django_quanttide.models.operations.AlterIDFieldToBinary`迁移。
+
     :param primary_key: 是否作为主键，默认为True
     :type primary_key: bool
     :param editable: 是否可编辑，默认为非主键字段可编辑
     :type editable: bool
-    :param default: 默认值，默认为uuid.uuid4
+    :param time_ordered: 是否使用时间有序的UUIDv7作为默认值，默认为False
+    :type time_ordered: bool
+    :param binary: 在没有原生UUID类型的数据库上是否以16字节二进制存储，默认为False
+    :type binary: bool
+    :param default: 默认值，默认为uuid.uuid4，`time_ordered=True`时为uuid7
     :type default: callable
     :param verbose_name: 字段名称，默认为'ID'
     :type verbose_name: str
     """
     description = 'ID字段'
 
-    def __init__(self, **options):
+    def __init__(self, time_ordered=False, binary=False, **options):
+        self.binary = binary
         options.setdefault('primary_key', True)
         options.setdefault('editable', not options['primary_key'])
         options.setdefault('null', not options['primary_key'])
         options.setdefault('blank', not options['primary_key'])
-        options.setdefault('default', uuid.uuid4 if options['primary_key'] else None)
+        generator = uuid7 if time_ordered else uuid.uuid4
+        options.setdefault('default', generator if options['primary_key'] else None)
         options.setdefault('verbose_name', 'ID')
         super().__init__(**options)
 
@@ -44,12 +87,55 @@ class IDField(models.UUIDField):
         for arg in ['primary_key', 'editable', 'null', 'blank', 'default', 'verbose_name']:
             if hasattr(self, arg):
                 kwargs[arg] = getattr(self, arg)
+        if self.binary:
+            kwargs['binary'] = True
         return name, path, args, kwargs
 
+    def get_internal_type(self):
+        # 二进制存储时避免数据库后端按UUID字符串转换查询结果
+        return 'BinaryField' if self.binary else super().get_internal_type()
+
+    def db_type(self, connection):
+        if not self.binary:
+            return super().db_type(connection)
+        if connection.features.has_native_uuid_field:
+            return connection.data_types['UUIDField']
+        return BINARY_UUID_DB_TYPES.get(connection.vendor, connection.data_types['BinaryField'])
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not self.binary or connection.features.has_native_uuid_field:
+            return super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        if not prepared:
+            value = self.get_prep_value(value)
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        return value.bytes
+
+    def get_db_converters(self, connection):
+        # 只有二进制存储需要转换查询结果
+        return super().get_db_converters(connection) if self.binary else []
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, (bytes, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return value
+
+
+# 没有原生UUID类型的数据库上16字节二进制列的类型，未列出的数据库使用BinaryField的类型
+BINARY_UUID_DB_TYPES = {
+    'mysql': 'binary(16)',
+    'oracle': 'RAW(16)',
+}
+
 
 class NumberField(models.IntegerField):
     """
     编号字段
+
+    保存时若字段值为空，则由编号分配器分配新编号，参见`django_quanttide.models.sequences`；
+    插入时已指定编号或更新时修改了编号则推进分配器，此后分配的编号不会与之重复。
     """
     description = "编号字段"
 
@@ -62,14 +148,17 @@ class NumberField(models.IntegerField):
     def pre_save(self, model_instance, add):
         value = getattr(model_instance, self.attname)
         if not value:
-            # 如果字段值为空，则生成一个自增的值
-            queryset = model_instance.__class__.objects.all()
-            if queryset:
-                last_object = queryset.latest(self.attname)
-                value = getattr(last_object, self.attname) + 1
-            else:
-                value = 1
+            # 如果字段值为空，则分配一个新编号
+            using = router.db_for_write(model_instance.__class__, instance=model_instance)
+            value = get_number_allocator(connections[using]).allocate(self, using)
             setattr(model_instance, self.attname, value)
+        elif (
+            not getattr(model_instance._state, 'numbers_reserved', False) if add
+            else getattr(model_instance, '_loaded_values', {}).get(self.attname) != value
+        ):
+            # 显式指定或修改的编号，`reserve_numbers`已经推进过的除外
+            using = router.db_for_write(model_instance.__class__, instance=model_instance)
+            get_number_allocator(connections[using]).advance(self, value, using)
         return value
 
 
@@ -87,16 +176,25 @@ class NameField(models.SlugField):
     :type unique: bool
     :param verbose_name: 字段的可读名称，默认为“标识”。
     :type verbose_name: str
+    :param cached: 是否缓存标识到主键的映射，参见`django_quanttide.models.cache`，默认为False
+    :type cached: bool
     """
     description = "标识字段"
 
-    def __init__(self, **options):
+    def __init__(self, cached=False, **options):
+        self.cached = cached
         # ChatGPT建议的值是50-70，这里取了一个稍大的值。
         options.setdefault('max_length', 100)
         options.setdefault('unique', True)
         options.setdefault('verbose_name', '标识')
         super().__init__(**options)
 
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.cached:
+            kwargs['cached'] = True
+        return name, path, args, kwargs
+
 
 class VerboseNameField(models.CharField):
     """
@@ -150,10 +248,41 @@ class TitleField(models.CharField):
         super().__init__(**options)
 
 
+# 延迟加载的大字段被逐行加载的次数，键为"<模型标签>.<字段名>"
+deferred_field_loads = Counter()
+
+
+class DeferredFieldLoadWarning(RuntimeWarning):
+    """
+    延迟加载的大字段被逐行加载
+    """
+
+
+class LargeFieldDeferredAttribute(DeferredAttribute):
+    """
+    大字段描述符
+
+    列表查询默认延迟加载大字段，访问未加载的值时会逐行查询数据库，
+    此时发出`DeferredFieldLoadWarning`并计入`deferred_field_loads`。
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is not None and self.field.attname not in instance.__dict__:
+            label = f'{self.field.model._meta.label}.{self.field.name}'
+            deferred_field_loads[label] += 1
+            warnings.warn(
+                f'Deferred field {label} is loaded per row, use with_large_fields() to load it in the query',
+                DeferredFieldLoadWarning, stacklevel=2,
+            )
+        return super().__get__(instance, cls)
+
+
 class DescriptionField(models.CharField):
     """
     描述字段
 
+    列表查询默认延迟加载，参见`django_quanttide.models.managers.ManagerMixin`。
+
     :param default: 字段的默认值，默认为空字符串。
     :type default: str
     :param blank: 如果为True，则该字段允许为空值，默认为True。
@@ -164,6 +293,7 @@ class DescriptionField(models.CharField):
     :type verbose_name: str
     """
     description = "描述字段"
+    descriptor_class = LargeFieldDeferredAttribute
 
     def __init__(self, **options):
         options.setdefault('max_length', 8196)
@@ -178,6 +308,11 @@ class ReadmeField(models.TextField):
     """
     描述字段
 
+    列表查询默认延迟加载，参见`django_quanttide.models.managers.ManagerMixin`。
+
+    设置`compressed=True`后以二进制列存储，读写时透明压缩和解压，格式参见`django_quanttide.models.compression`。
+    压缩存储的字段只支持`exact`、`in`和`isnull`查询。
+
     :param default: 字段的默认值，默认为空字符串。
     :type default: str
     :param blank: 如果为True，则该字段允许为空值，默认为True。
@@ -186,22 +321,180 @@ class ReadmeField(models.TextField):
     :type null: bool
     :param verbose_name: 字段的可读名称，默认为“描述”。
     :type verbose_name: str
+    :param compressed: 是否压缩存储，默认为False
+    :type compressed: bool
+    :param codec: 压缩编码名称，默认为'zlib'
+    :type codec: str
+    :param threshold: 压缩的最小字节数，更短的值保存原文，默认为256
+    :type threshold: int
     """
     description = "描述字段"
-
-    def __init__(self, **options):
+    descriptor_class = LargeFieldDeferredAttribute
+
+    def __init__(self, compressed=False, codec='zlib', threshold=256, **options):
+        self.compressed = compressed
+        self.codec = codec
+        self.threshold = threshold
+        if compressed:
+            # 尽早发现未注册的编码
+            get_codec(codec)
         options.setdefault('default', None)
         options.setdefault('blank', True)
         options.setdefault('null', True)
         options.setdefault('verbose_name', '简介')
         super().__init__(**options)
 
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compressed:
+            kwargs['compressed'] = True
+            if self.codec != 'zlib':
+                kwargs['codec'] = self.codec
+            if self.threshold != 256:
+                kwargs['threshold'] = self.threshold
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField' if self.compressed else super().get_internal_type()
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if not self.compressed or value is None:
+            return value
+        return encode(value, get_codec(self.codec), self.threshold)
+
+    def get_db_converters(self, connection):
+        return super().get_db_converters(connection) if self.compressed else []
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, (bytes, memoryview)):
+            return decode(value)
+        return value
+
 
-class TypeField(models.CharField):
+class ChoiceLabelMixin:
+    """
+    选项标签字段
+
+    初始化时预先计算选项值到标签的映射`choice_labels`，并替换模型的`get_FOO_display`方法，
+    渲染标签只需一次字典查找，不再每次调用时重建选项字典。
+    """
+
+    def __init__(self, *args, **options):
+        super().__init__(*args, **options)
+        self.choice_labels = dict(self.flatchoices)
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        # 保留模型类中自定义的get_FOO_display方法
+        overridden = f'get_{name}_display' in cls.__dict__
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        if self.choices is not None and not overridden:
+            attname, labels = self.attname, self.choice_labels
+
+            def get_display(instance):
+                value = getattr(instance, attname)
+                return force_str(labels.get(value, value), strings_only=True)
+
+            setattr(cls, f'get_{self.name}_display', get_display)
+
+
+# 不对应任何选项的编码，查询不存在的选项值时使用
+NO_CHOICE_CODE = 0
+
+
+class CompactExact(lookups.Exact):
+    def get_db_prep_lookup(self, value, connection):
+        # 不存在的选项值查不到任何行，与字符串列一致
+        return '%s', [self.lhs.output_field.choice_codes.get(value, NO_CHOICE_CODE)]
+
+
+class CompactIn(lookups.In):
+    def process_rhs(self, compiler, connection):
+        if self.rhs_is_direct_value():
+            codes = self.lhs.output_field.choice_codes
+            rhs = [value for value in self.rhs if value in codes]
+            if not rhs:
+                raise EmptyResultSet
+            return '(' + ', '.join(['%s'] * len(rhs)) + ')', [codes[value] for value in rhs]
+        return super().process_rhs(compiler, connection)
+
+
+# 紧凑存储时支持的查询
+COMPACT_LOOKUPS = {
+    'exact': CompactExact,
+    'in': CompactIn,
+    'isnull': lookups.IsNull,
+}
+
+
+class CompactChoicesMixin:
+    """
+    紧凑存储选项字段
+
+    设置`compact=True`后数据库中存储小整数编码，Python和API中仍使用字符串选项值。
+    编码为选项在`choices`中的序号（从1开始），新增选项只能追加到末尾；
+    按该字段排序时按编码即`choices`中的顺序排列，不再按选项值或标签的字母顺序；
+    已有数据的字段可以使用`django_quanttide.models.operations.AlterChoicesToCompact`迁移。
+
+    紧凑存储时只支持`exact`、`in`和`isnull`查询，查询不存在的选项值返回空结果；
+    `icontains`、`startswith`等字符串匹配和`gt`等比较查询无法在编码上实现，抛出`FieldError`。
+    保存不存在的选项值抛出`ValueError`。
+    """
+
+    def __init__(self, *args, compact=False, **options):
+        self.compact = compact
+        super().__init__(*args, **options)
+        self.choice_codes = {value: code for code, (value, label) in enumerate(self.flatchoices, start=1)}
+        self.code_choices = {code: value for value, code in self.choice_codes.items()}
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compact:
+            kwargs['compact'] = True
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'SmallIntegerField' if self.compact else super().get_internal_type()
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if not self.compact or value is None:
+            return value
+        try:
+            return self.choice_codes[value]
+        except KeyError:
+            raise ValueError(f'Field {self.name!r} has no choice {value!r}') from None
+
+    def get_lookup(self, lookup_name):
+        lookup = super().get_lookup(lookup_name)
+        if not self.compact or lookup is None:
+            return lookup
+        try:
+            return COMPACT_LOOKUPS[lookup_name]
+        except KeyError:
+            raise FieldError(
+                f'Field {self.name!r} stores compact choice codes and does not support the {lookup_name!r} lookup.'
+            ) from None
+
+    def get_db_converters(self, connection):
+        converters = super().get_db_converters(connection)
+        if self.compact:
+            converters = converters + [self.from_db_code]
+        return converters
+
+    def from_db_code(self, value, expression, connection):
+        return self.code_choices.get(value, value)
+
+
+class TypeField(ChoiceLabelMixin, CompactChoicesMixin, models.CharField):
     """
     类型字段
 
     描述系统中而非用户自定义的分类，每个类型通常对应一个子类。
+
+    :param compact: 是否在数据库中存储整数编码，默认为False，参见`CompactChoicesMixin`
+    :type compact: bool
     """
     description = "类型字段"
 
@@ -213,11 +506,14 @@ class TypeField(models.CharField):
         super().__init__(**options)
 
 
-class StatusField(models.CharField):
+class StatusField(ChoiceLabelMixin, CompactChoicesMixin, models.CharField):
     """
     状态字段
 
     描述系统中而非用户自定义的状态，用状态的变化来描述生命周期。
+
+    :param compact: 是否在数据库中存储整数编码，默认为False，参见`CompactChoicesMixin`
+    :type compact: bool
     """
     def __init__(self, choices, default=None, **options):
         options.setdefault('max_length', 50)
@@ -227,7 +523,7 @@ class StatusField(models.CharField):
         super().__init__(**options)
 
 
-class StageField(models.IntegerField):
+class StageField(ChoiceLabelMixin, models.IntegerField):
     """
     研发阶段字段
 
@@ -243,6 +539,23 @@ class StageField(models.IntegerField):
         super().__init__(**options)
 
 
+_keep_timestamps = ContextVar('django_quanttide_keep_timestamps', default=False)
+
+
+@contextmanager
+def keep_timestamps():
+    """
+    保存时保留已有的创建时间和更新时间
+
+    用于导入数据，只有值为空的`CreatedAtField`和`UpdatedAtField`填充为当前时间。
+    """
+    token = _keep_timestamps.set(True)
+    try:
+        yield
+    finally:
+        _keep_timestamps.reset(token)
+
+
 class CreatedAtField(models.DateTimeField):
     """
     创建时间字段
@@ -259,6 +572,12 @@ class CreatedAtField(models.DateTimeField):
         options.setdefault('verbose_name', '创建时间')
         super().__init__(**options)
 
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if value is not None and _keep_timestamps.get():
+            return value
+        return super().pre_save(model_instance, add)
+
 
 class UpdatedAtField(models.DateTimeField):
     """
@@ -276,6 +595,12 @@ class UpdatedAtField(models.DateTimeField):
         options.setdefault('verbose_name', '更新时间')
         super().__init__(**options)
 
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if value is not None and _keep_timestamps.get():
+            return value
+        return super().pre_save(model_instance, add)
+
 
 class CreatedByField(models.ForeignKey):
     """
@@ -301,6 +626,14 @@ class CreatedByField(models.ForeignKey):
         options.setdefault('verbose_name', '创建者')
         super().__init__(user_model, on_delete, **options)
 
+    def pre_save(self, model_instance, add):
+        # 新建时若未指定，则填充为当前请求的用户，参见`django_quanttide.middleware.AuditUserMiddleware`
+        if add and getattr(model_instance, self.attname) is None:
+            user = get_current_user()
+            if user is not None:
+                setattr(model_instance, self.attname, user.pk)
+        return super().pre_save(model_instance, add)
+
 
 class UpdatedByField(models.ForeignKey):
     """
@@ -325,3 +658,10 @@ class UpdatedByField(models.ForeignKey):
         options.setdefault('null', True)
         options.setdefault('verbose_name', '更新者')
         super().__init__(user_model, on_delete, **options)
+
+    def pre_save(self, model_instance, add):
+        # 每次保存时填充为当前请求的用户，参见`django_quanttide.middleware.AuditUserMiddleware`
+        user = get_current_user()
+        if user is not None:
+            setattr(model_instance, self.attname, user.pk)
+        return super().pre_save(model_instance, add)
@@ -0,0 +1,39 @@
+"""
+数据模型索引
+"""
+
+from django.db import models
+
+
+def keyset_index(name, created_at='created_at'):
+    """
+    键集分页所需的`(created_at, id)`复合索引
+
+    示例：
+
+    ```
+    class Project(Model):
+        created_at = CreatedAtField()
+
+        class Meta:
+            indexes = [keyset_index('project_keyset_idx')]
+    ```
+
+    :param name: 索引名称
+    :param created_at: 创建时间字段名称，默认为`created_at`
+    :return: 索引
+    """
+    return models.Index(fields=[created_at, 'id'], name=name)
+
+
+def polymorphic_type_index(name, created_at='created_at'):
+    """
+    按类型过滤并按时间排序的复合索引
+
+    配合`PolymorphicQuerySet.of_type`使用，只按`polymorphic_ctype_id`列过滤，不关联`django_content_type`表。
+
+    :param name: 索引名称
+    :param created_at: 创建时间字段名
+    :return: `(polymorphic_ctype_id, created_at)`上的索引
+    """
+    return models.Index(fields=['polymorphic_ctype', created_at], name=name)
@@ -0,0 +1,97 @@
+"""
+键集分页
+
+按`(created_at, id)`排序分页：下一页的条件从上一页最后一行的键值构造，
+配合`keyset_index`创建的复合索引，任意页的查询代价与第一页相同。
+"""
+
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+KeysetPage = namedtuple('KeysetPage', ['objects', 'next_cursor'])
+
+
+def keyset_fields(model):
+    """
+    查找模型的分页键字段
+
+    :param model: 模型类
+    :return: 创建时间字段和主键字段，没有`CreatedAtField`时只有主键字段
+    """
+    from .fields import CreatedAtField
+
+    fields = [field for field in model._meta.concrete_fields if isinstance(field, CreatedAtField)][:1]
+    return fields + [model._meta.pk]
+
+
+def encode_cursor(instance, fields) -> str:
+    """
+    将实例的分页键编码为不透明游标
+
+    :param instance: 模型实例
+    :param fields: 分页键字段
+    :return: 游标
+    """
+    values = [field.value_to_string(instance) for field in fields]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields) -> list:
+    """
+    解码游标
+
+    :param cursor: 游标
+    :param fields: 分页键字段
+    :return: 分页键值列表
+    :raises ValueError: 游标无效
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError('Invalid cursor')
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, TypeError, ValidationError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def keyset_condition(fields, values, descending=False) -> models.Q:
+    """
+    构造下一页的过滤条件
+
+    首个键使用闭区间，数据库可以直接从索引中的游标位置开始扫描。
+    """
+    first, rest = fields[0].attname, fields[1:]
+    if not rest:
+        return models.Q(**{f'{first}__{"lt" if descending else "gt"}': values[0]})
+    strict = 'lt' if descending else 'gt'
+    inclusive = 'lte' if descending else 'gte'
+    return models.Q(**{f'{first}__{inclusive}': values[0]}) & (
+        models.Q(**{f'{first}__{strict}': values[0]}) | keyset_condition(rest, values[1:], descending)
+    )
+
+
+def keyset_paginate(queryset, cursor=None, size=20, descending=False) -> KeysetPage:
+    """
+    键集分页
+
+    :param queryset: 查询集
+    :param cursor: 上一页返回的游标，默认为第一页
+    :param size: 每页数量
+    :param descending: 是否按时间倒序
+    :return: 当前页的对象列表和下一页游标，没有下一页时游标为None
+    :raises ValueError: 游标无效
+    """
+    fields = keyset_fields(queryset.model)
+    queryset = queryset.order_by(*[f'-{field.attname}' if descending else field.attname for field in fields])
+    if cursor:
+        queryset = queryset.filter(keyset_condition(fields, decode_cursor(cursor, fields), descending))
+    objects = list(queryset[:size + 1])
+    if len(objects) <= size:
+        return KeysetPage(objects, None)
+    objects = objects[:size]
+    return KeysetPage(objects, encode_cursor(objects[-1], fields))
@@ -0,0 +1,537 @@
+"""
+数据模型管理器
+"""
+
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.db import models, connections, transaction
+from django.db.models.constants import LOOKUP_SEP
+from polymorphic.managers import PolymorphicManager as BasePolymorphicManager
+from polymorphic.query import PolymorphicQuerySet as BasePolymorphicQuerySet
+
+from . import cache
+from .keyset import keyset_paginate
+from .sequences import reserve_numbers
+
+
+def audit_fields(model):
+    """
+    查找模型的审计字段
+
+    :param model: 模型类
+    :return: `CreatedByField`和`UpdatedByField`字段列表
+    """
+    from .fields import CreatedByField, UpdatedByField
+
+    return [field for field in model._meta.concrete_fields if isinstance(field, (CreatedByField, UpdatedByField))]
+
+
+def large_fields(model):
+    """
+    查找模型的大字段
+
+    :param model: 模型类
+    :return: `DescriptionField`和`ReadmeField`字段列表
+    """
+    from .fields import DescriptionField, ReadmeField
+
+    return [field for field in model._meta.concrete_fields if isinstance(field, (DescriptionField, ReadmeField))]
+
+
+def upsert_update_fields(model, unique_fields):
+    """
+    `bulk_upsert`默认在冲突时更新的字段
+
+    :param model: 模型类
+    :param unique_fields: 冲突判断字段名列表
+    :return: 除主键、冲突判断字段、编号字段、创建时间和创建者字段以外的字段名列表
+    """
+    from .fields import NumberField, CreatedAtField, CreatedByField
+
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in unique_fields
+        and not isinstance(field, (NumberField, CreatedAtField, CreatedByField))
+    ]
+
+
+def _subclasses(model):
+    for subclass in model.__subclasses__():
+        if not subclass._meta.abstract:
+            yield subclass
+        yield from _subclasses(subclass)
+
+
+# 多态模型类到类型值和模型类字典的缓存
+_polymorphic_types = {}
+
+
+def polymorphic_types(model):
+    """
+    多态模型继承层级中的类型值
+
+    :param model: 多态模型类
+    :return: 类型值到模型类的字典，包括模型本身和全部子类
+    """
+    try:
+        return _polymorphic_types[model]
+    except KeyError:
+        pass
+    types = _polymorphic_types[model] = {
+        klass._meta.model_name: klass for klass in [model, *_subclasses(model)]
+    }
+    return types
+
+
+def _load_names(deferred_loading, names):
+    # 从延迟加载设置中移除字段，`defer`模式下移出延迟集合，`only`模式下加入立即加载集合
+    existing, defer = deferred_loading
+    if defer:
+        return frozenset(existing).difference(names), True
+    return frozenset(existing).union(names), False
+
+
+class QuerySetMixin:
+    """
+    查询集扩展
+
+    `bulk_create`为编号字段一次预留整批编号，避免逐个实例分配。
+    启用对象缓存的模型，`update`等绕过信号的批量写入使模型的对象缓存失效。
+    管理器默认延迟加载的大字段在`get`和`only`时恢复加载，显式调用`defer`延迟加载的大字段除外。
+    """
+    # 是否为管理器默认的大字段延迟加载
+    _large_fields_default = False
+    # 显式调用`defer`延迟加载的大字段，撤销管理器默认的延迟加载时保留
+    _large_fields_explicit = frozenset()
+
+    def _clone(self, *args, **kwargs):
+        clone = super()._clone(*args, **kwargs)
+        clone._large_fields_default = self._large_fields_default
+        clone._large_fields_explicit = self._large_fields_explicit
+        return clone
+
+    def _undo_large_fields_default(self):
+        if not self._large_fields_default:
+            return self
+        return self._load_large_fields(
+            {field.name for field in large_fields(self.model)} - self._large_fields_explicit
+        )
+
+    def get(self, *args, **kwargs):
+        queryset = self._undo_large_fields_default()
+        return super(QuerySetMixin, queryset).get(*args, **kwargs)
+
+    def only(self, *fields):
+        queryset = self._undo_large_fields_default()
+        loaded = {name.split(LOOKUP_SEP, 1)[0] for name in fields}
+        queryset = queryset._drop_audit_select_related(
+            [field.name for field in audit_fields(self.model) if field.name not in loaded]
+        )
+        return super(QuerySetMixin, queryset).only(*fields)
+
+    def defer(self, *fields):
+        queryset = self._drop_audit_select_related([name for name in fields if name is not None])
+        queryset = super(QuerySetMixin, queryset).defer(*fields)
+        if fields == (None,):
+            queryset._large_fields_default = False
+            queryset._large_fields_explicit = frozenset()
+        elif self._large_fields_default:
+            queryset._large_fields_explicit = self._large_fields_explicit | (
+                set(fields) & {field.name for field in large_fields(self.model)}
+            )
+        return queryset
+
+    def select_for_update(self, nowait=False, skip_locked=False, of=(), no_key=False):
+        # 审计字段可以为空，关联查询为外连接，PostgreSQL不能对外连接的可空一侧加锁
+        queryset = self if of else self._drop_audit_select_related([field.name for field in audit_fields(self.model)])
+        return super(QuerySetMixin, queryset).select_for_update(
+            nowait=nowait, skip_locked=skip_locked, of=of, no_key=no_key,
+        )
+
+    def _drop_audit_select_related(self, names):
+        # 延迟加载的审计字段不能同时关联查询，从`select_audit`的关联查询中移除
+        select_related = self.query.select_related
+        if not isinstance(select_related, dict):
+            return self
+        names = {field.name for field in audit_fields(self.model) if field.name in names} & select_related.keys()
+        if not names:
+            return self
+        queryset = self._chain()
+        queryset.query.select_related = {
+            name: value for name, value in select_related.items() if name not in names
+        } or False
+        return queryset
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        reserve_numbers(self.model, objs, self.db)
+        result = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get('update_conflicts') and cache.object_cache_enabled(self.model):
+            cache.touch_model(self.model, self.db)
+        return result
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        # 与`save`一致，更新时间和更新者字段随每次更新填充
+        from .fields import UpdatedAtField, UpdatedByField
+
+        objs = list(objs)
+        fields = list(fields)
+        for field in self.model._meta.concrete_fields:
+            if isinstance(field, (UpdatedAtField, UpdatedByField)):
+                for obj in objs:
+                    field.pre_save(obj, False)
+                if field.name not in fields:
+                    fields.append(field.name)
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+    def update(self, **kwargs):
+        # 批量更新不发送信号，使整个模型的对象缓存失效
+        rows = super().update(**kwargs)
+        if rows and cache.object_cache_enabled(self.model):
+            cache.touch_model(self.model, self.db)
+        return rows
+
+    def select_audit(self, user_fields=None):
+        """
+        关联查询审计字段的用户
+
+        :param user_fields: 只加载的用户字段名列表，默认加载全部字段
+        :return: 查询集
+        """
+        fields = audit_fields(self.model)
+        if not fields:
+            return self
+        queryset = self.select_related(*[field.name for field in fields])
+        if user_fields is not None:
+            deferred = [
+                f'{field.name}__{user_field.attname}'
+                for field in fields
+                for user_field in field.related_model._meta.concrete_fields
+                if not user_field.primary_key and user_field.name not in user_fields
+            ]
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+    def defer_large_fields(self):
+        """
+        延迟加载大字段
+
+        :return: 查询集
+        """
+        names = [field.name for field in large_fields(self.model)]
+        if not names:
+            return self
+        return self.defer(*names)
+
+    def with_large_fields(self):
+        """
+        立即加载大字段，撤销`defer_large_fields`
+
+        :return: 查询集
+        """
+        return self._load_large_fields({field.name for field in large_fields(self.model)})
+
+    def _load_large_fields(self, names):
+        clone = self._chain()
+        clone._large_fields_default = False
+        clone._large_fields_explicit = frozenset()
+        if names:
+            clone.query.deferred_loading = _load_names(clone.query.deferred_loading, names)
+            if hasattr(clone, 'polymorphic_deferred_loading'):
+                clone.polymorphic_deferred_loading = _load_names(clone.polymorphic_deferred_loading, names)
+        return clone
+
+    def resolve_name(self, name):
+        """
+        解析标识对应的主键，参见`django_quanttide.models.cache`
+
+        :param name: 标识
+        :return: 主键
+        """
+        return cache.resolve_name(self, name)
+
+    def resolve_names(self, names):
+        """
+        批量解析标识对应的主键
+
+        :param names: 标识列表
+        :return: 标识到主键的字典，不存在的标识不在字典中
+        """
+        return cache.resolve_names(self, names)
+
+    def get_by_name(self, name):
+        """
+        按标识查询实例，标识到主键的映射命中缓存时按主键查询
+
+        :param name: 标识
+        :return: 实例
+        """
+        return cache.get_by_name(self, name)
+
+    def get_many_by_name(self, names):
+        """
+        按标识批量查询实例
+
+        :param names: 标识列表
+        :return: 标识到实例的字典，不存在的标识不在字典中
+        """
+        return cache.get_many_by_name(self, names)
+
+    def cached_get(self, pk):
+        """
+        按主键读取实例，优先使用对象缓存，需要管理器启用`object_cached`，参见`django_quanttide.models.cache`
+
+        :param pk: 主键
+        :return: 实例
+        """
+        return cache.cached_get(self, pk)
+
+    def cached_in_bulk(self, pks):
+        """
+        按主键批量读取实例，未命中缓存的主键用一次查询补全
+
+        :param pks: 主键列表
+        :return: 主键到实例的字典，不存在的主键不在字典中
+        """
+        return cache.cached_in_bulk(self, pks)
+
+    async def aresolve_name(self, name):
+        """
+        `resolve_name`的异步版本
+        """
+        return await sync_to_async(self.resolve_name)(name)
+
+    async def aresolve_names(self, names):
+        """
+        `resolve_names`的异步版本
+        """
+        return await sync_to_async(self.resolve_names)(names)
+
+    async def aget_by_name(self, name):
+        """
+        `get_by_name`的异步版本
+        """
+        return await sync_to_async(self.get_by_name)(name)
+
+    async def aget_many_by_name(self, names):
+        """
+        `get_many_by_name`的异步版本
+        """
+        return await sync_to_async(self.get_many_by_name)(names)
+
+    async def acached_get(self, pk):
+        """
+        `cached_get`的异步版本
+        """
+        return await sync_to_async(self.cached_get)(pk)
+
+    async def acached_in_bulk(self, pks):
+        """
+        `cached_in_bulk`的异步版本
+        """
+        return await sync_to_async(self.cached_in_bulk)(pks)
+
+    def keyset(self, cursor=None, size=20, descending=False):
+        """
+        按`(created_at, id)`键集分页，参见`django_quanttide.models.keyset`
+
+        :param cursor: 上一页返回的游标，默认为第一页
+        :param size: 每页数量
+        :param descending: 是否按时间倒序
+        :return: `KeysetPage(objects, next_cursor)`
+        """
+        return keyset_paginate(self, cursor, size, descending)
+
+
+class ManagerMixin:
+    """
+    管理器扩展
+
+    默认关联查询审计字段的用户，避免列表序列化用户时的N+1查询；
+    `only`和`defer`延迟加载的审计字段、未指定`of`的`select_for_update`不关联查询审计用户。
+    默认延迟加载模型自身的`DescriptionField`和`ReadmeField`（多态查询不包括子类的字段），列表查询不读取大字段，
+    `get`时照常加载，列表需要时用`with_large_fields()`显式加载。
+
+    :param audit_select_related: 是否默认关联查询审计字段的用户，默认为True
+    :param audit_user_fields: 只加载的用户字段名列表，默认加载全部字段
+    :param large_fields_deferred: 是否默认延迟加载大字段，默认为True
+    :param object_cached: 是否启用对象缓存，参见`django_quanttide.models.cache`，默认为False
+    """
+    audit_select_related = True
+    audit_user_fields = None
+    large_fields_deferred = True
+    object_cached = False
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.audit_select_related:
+            queryset = queryset.select_audit(self.audit_user_fields)
+        if self.large_fields_deferred and large_fields(self.model):
+            queryset = queryset.defer_large_fields()
+            queryset._large_fields_default = True
+        return queryset
+
+
+class QuerySet(QuerySetMixin, models.QuerySet):
+    """
+    基本数据模型查询集
+    """
+
+    def bulk_upsert(self, objs, batch_size=1000, unique_fields=None, update_fields=None):
+        """
+        批量插入或更新
+
+        按块写入，每块在一个事务中执行固定数量的语句：为编号字段预留一段编号，
+        一条`INSERT ... ON CONFLICT DO UPDATE`写入整块，再用一条查询取回已存在的行的主键等未更新的字段。
+        ID、编号、创建时间、更新时间和审计用户字段的默认值与逐个`save`一致。
+        同一块中冲突判断字段重复的实例只写入最后一个。
+
+        :param objs: 模型实例列表
+        :param batch_size: 每块的最大实例数，不超过数据库单条语句的参数上限
+        :param unique_fields: 冲突判断字段名列表，默认为`NameField`
+        :param update_fields: 冲突时更新的字段名列表，默认参见`upsert_update_fields`
+        :return: 实例列表，主键与数据库一致
+        """
+        opts = self.model._meta
+        if unique_fields is None:
+            unique_fields = [cache.name_field(self.model).name]
+        if update_fields is None:
+            update_fields = upsert_update_fields(self.model, unique_fields)
+        objs = list(objs)
+        if not objs:
+            return objs
+        unique_attnames = [opts.get_field(name).attname for name in unique_fields]
+        synced_fields = [
+            field for field in opts.concrete_fields
+            if field.name not in unique_fields and field.name not in update_fields
+        ]
+        batch_size = min(batch_size, connections[self.db].ops.bulk_batch_size(opts.concrete_fields, objs))
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            unique_objs = list({self._unique_key(obj, unique_attnames): obj for obj in batch}.values())
+            with transaction.atomic(using=self.db, savepoint=False):
+                self.bulk_create(
+                    unique_objs, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields,
+                )
+                self._sync_upserted(batch, unique_attnames, synced_fields)
+        return objs
+
+    async def abulk_upsert(self, objs, batch_size=1000, unique_fields=None, update_fields=None):
+        """
+        `bulk_upsert`的异步版本
+        """
+        return await sync_to_async(self.bulk_upsert)(
+            objs, batch_size=batch_size, unique_fields=unique_fields, update_fields=update_fields,
+        )
+
+    @staticmethod
+    def _unique_key(obj, attnames):
+        return tuple(getattr(obj, attname) for attname in attnames)
+
+    def _sync_upserted(self, objs, unique_attnames, fields):
+        # 冲突更新的行保留原有的主键、编号和创建信息，取回后写入实例
+        keys = {self._unique_key(obj, unique_attnames) for obj in objs}
+        if len(unique_attnames) == 1:
+            condition = models.Q(**{f'{unique_attnames[0]}__in': [key[0] for key in keys]})
+        else:
+            condition = reduce(or_, (models.Q(**dict(zip(unique_attnames, key))) for key in keys))
+        attnames = [field.attname for field in fields]
+        rows = self.model._base_manager.using(self.db).filter(condition).values_list(*unique_attnames, *attnames)
+        values = {row[:len(unique_attnames)]: row[len(unique_attnames):] for row in rows}
+        for obj in objs:
+            for attname, value in zip(attnames, values[self._unique_key(obj, unique_attnames)]):
+                setattr(obj, attname, value)
+
+
+class PolymorphicQuerySet(QuerySetMixin, BasePolymorphicQuerySet):
+    """
+    多态数据模型查询集
+    """
+
+    def of_type(self, *names):
+        """
+        按类型值过滤
+
+        类型值即`PolymorphicModel.type`，通过ContentType缓存解析为主键，只按`polymorphic_ctype_id`列过滤，
+        不关联`django_content_type`表。只匹配类型本身，不包括其子类；
+        配合`django_quanttide.models.indexes.polymorphic_type_index`使用。
+
+        :param names: 类型值，如'childmodel'
+        :return: 查询集
+        :raises ValueError: 类型值不属于当前模型的继承层级
+        """
+        from django.contrib.contenttypes.models import ContentType
+
+        types = polymorphic_types(self.model)
+        try:
+            models_ = [types[name] for name in names]
+        except KeyError as e:
+            raise ValueError(f'{e.args[0]!r} is not a type of {self.model._meta.label}.') from None
+        # 从ContentType的进程内缓存读取，每种类型只在首次使用时查询一次数据库
+        content_types = ContentType.objects.db_manager(self.db).get_for_models(*models_, for_concrete_models=False)
+        return self.filter(polymorphic_ctype_id__in=[content_type.pk for content_type in content_types.values()])
+
+    def stream(self, chunk_size=1000):
+        """
+        分块流式读取
+
+        基类数据行按块读取，每块对每种子类型只执行一次批量查询，保持原有顺序，
+        内存占用只与块大小有关，适用于导出和大列表。
+
+        :param chunk_size: 每块的行数
+        :return: 模型实例迭代器
+        """
+        base_iterator = self.non_polymorphic().iterator(chunk_size=chunk_size)
+        while True:
+            base_objects = list(islice(base_iterator, chunk_size))
+            if not base_objects:
+                return
+            if self.polymorphic_disabled:
+                yield from base_objects
+            else:
+                yield from self._get_real_instances(base_objects)
+
+    async def astream(self, chunk_size=1000):
+        """
+        异步分块流式读取
+
+        每块在一次`sync_to_async`调用中读取基类数据行并查询子类型。
+
+        :param chunk_size: 每块的行数
+        :return: 模型实例异步迭代器
+        """
+        iterator = self.stream(chunk_size=chunk_size)
+        next_chunk = sync_to_async(lambda: list(islice(iterator, chunk_size)))
+        while True:
+            chunk = await next_chunk()
+            if not chunk:
+                return
+            for instance in chunk:
+                yield instance
+
+
+class Manager(ManagerMixin, models.Manager.from_queryset(QuerySet)):
+    """
+    基本数据模型管理器
+    """
+
+
+class PolymorphicManager(ManagerMixin, BasePolymorphicManager.from_queryset(PolymorphicQuerySet)):
+    """
+    多态数据模型管理器
+    """
+
+    def stream(self, chunk_size=1000):
+        """
+        分块流式读取，参见`PolymorphicQuerySet.stream`
+        """
+        return self.all().stream(chunk_size=chunk_size)
+
+    def astream(self, chunk_size=1000):
+        """
+        异步分块流式读取，参见`PolymorphicQuerySet.astream`
+        """
+        return self.all().astream(chunk_size=chunk_size)
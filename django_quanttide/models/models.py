@@ -2,18 +2,132 @@
 数据模型
 """
 
-from django.db import models
+import hashlib
+from functools import lru_cache
 
-from .fields import IDField
+from django.db import models, DatabaseError
 
+from .fields import IDField, UpdatedAtField, UpdatedByField
+from .managers import Manager, large_fields
 
-class Model(models.Model):
+
+@lru_cache(maxsize=None)
+def _large_attnames(model) -> frozenset:
+    return frozenset(field.attname for field in large_fields(model))
+
+
+def _snapshot(model, attname, value):
+    # 大字段只记录摘要，不在实例中保存第二份文本
+    if attname in _large_attnames(model) and isinstance(value, str):
+        return hashlib.blake2b(value.encode(), digest_size=16).digest()
+    return value
+
+
+class DirtyFieldsMixin:
+    """
+    脏字段追踪
+
+    从数据库加载时记录字段值，`save`时只写入值有变化的字段，以及更新时间和更新者字段；
+    没有字段变化时不写入数据库，也不发送`pre_save`和`post_save`信号。
+    显式指定`update_fields`、强制插入或修改了主键时按原有方式保存。
+
+    只比较重新赋值的字段，原地修改的可变值（如JSON字段中的字典）需要显式指定`update_fields`。
+    延迟加载的字段未读取就赋值时视为有变化；大字段只记录值的摘要。
+
+    从数据库加载的实例对应的行已被删除时，与Django默认的`save`一致重新插入全部字段；
+    有延迟加载的字段时无法重新插入，与Django一致抛出`DatabaseError`。
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            attname: _snapshot(cls, attname, value) for attname, value in zip(field_names, values)
+        }
+        return instance
+
+    def get_dirty_fields(self) -> list:
+        """
+        值有变化的字段
+
+        :return: 字段名列表，未从数据库加载的实例返回全部字段
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded_values is None:
+            return [field.name for field in self._meta.concrete_fields]
+        # 延迟加载的字段不在`loaded_values`中，赋值后即视为有变化
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (
+                field.attname not in loaded_values
+                or _snapshot(type(self), field.attname, self.__dict__[field.attname]) != loaded_values[field.attname]
+            )
+        ]
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        loaded_values = getattr(self, '_loaded_values', None)
+        if (
+            update_fields is None and not force_insert and not self._state.adding and loaded_values is not None
+            and (using is None or using == self._state.db)
+            and loaded_values.get(self._meta.pk.attname) == self.pk
+        ):
+            dirty_fields = self.get_dirty_fields()
+            if not dirty_fields:
+                return
+            update_fields = dirty_fields + [
+                field.name for field in self._meta.concrete_fields
+                if isinstance(field, (UpdatedAtField, UpdatedByField)) and field.name not in dirty_fields
+            ]
+            # 行已被删除时按Django默认的方式重新插入，参见`_save_table`
+            self._dirty_update = True
+        try:
+            super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+        finally:
+            # 重新插入后保存了全部字段
+            if self.__dict__.pop('_dirty_update', True) is None:
+                update_fields = None
+        self._remember_values(update_fields)
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None,
+                    update_fields=None):
+        try:
+            return super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+        except DatabaseError as e:
+            # 只处理自动计算的`update_fields`没有更新任何行的情况，不包括数据库抛出的异常
+            if (
+                type(e) is not DatabaseError or update_fields is None
+                or not getattr(self, '_dirty_update', False) or self.get_deferred_fields()
+            ):
+                raise
+            # 在`save_base`的事务上下文内重试，没有执行失败的语句，不影响外层事务
+            self._dirty_update = None
+            return super()._save_table(raw, cls, force_insert, force_update, using, None)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+
+    def _remember_values(self, field_names=None):
+        if field_names is None:
+            fields = self._meta.concrete_fields
+        else:
+            fields = [self._meta.get_field(name) for name in field_names]
+        loaded_values = self.__dict__.setdefault('_loaded_values', {})
+        for field in fields:
+            if field.attname in self.__dict__:
+                loaded_values[field.attname] = _snapshot(type(self), field.attname, self.__dict__[field.attname])
+
+
+class Model(DirtyFieldsMixin, models.Model):
     """
     基本数据模型
 
     使用UUID代替integer自增字段作为默认ID字段。
+    保存时只写入有变化的字段，参见`DirtyFieldsMixin`。
     """
     id = IDField()
 
+    objects = Manager()
+
     class Meta:
         abstract = True
@@ -0,0 +1,136 @@
+"""
+数据迁移操作
+"""
+
+import uuid
+
+from django.db import migrations, NotSupportedError
+
+
+class AlterIDFieldToBinary(migrations.AlterField):
+    """
+    将已有的ID字段改为16字节二进制存储
+
+    用于替换`makemigrations`为`IDField(binary=True)`生成的`AlterField`，
+    在修改列类型的同时转换已有数据，支持反向迁移。
+    PostgreSQL等有原生UUID类型的数据库上与`AlterField`相同。
+
+    引用该列的外键列需要各自迁移；MySQL上存在外键约束时无法修改列类型，需要先删除约束。
+
+    示例：
+
+    ```
+    operations = [
+        AlterIDFieldToBinary(
+            model_name='member',
+            name='org_user_id',
+            field=IDField(primary_key=False, binary=True, verbose_name='组织用户ID'),
+        ),
+    ]
+    ```
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.features.has_native_uuid_field:
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        table, column = self._table_column(app_label, to_state)
+        if connection.vendor == 'mysql':
+            # 先改为变长二进制列保留十六进制文本，再原地转换为16字节
+            table, column = schema_editor.quote_name(table), schema_editor.quote_name(column)
+            schema_editor.execute(f'ALTER TABLE {table} MODIFY {column} varbinary(32)')
+            schema_editor.execute(f'UPDATE {table} SET {column} = UNHEX({column})')
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        elif connection.vendor == 'sqlite':
+            # SQLite重建数据表时原样复制十六进制文本，重建后再逐行转换
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+            self._convert(schema_editor, table, column, str, lambda value: uuid.UUID(hex=value).bytes)
+        else:
+            raise NotSupportedError(f'AlterIDFieldToBinary does not support {connection.vendor}')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # AlterField.database_backwards调用的是正向迁移，这里直接修改列类型
+        connection = schema_editor.connection
+        if connection.features.has_native_uuid_field:
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        table, column = self._table_column(app_label, from_state)
+        if connection.vendor == 'mysql':
+            table, column = schema_editor.quote_name(table), schema_editor.quote_name(column)
+            schema_editor.execute(f'ALTER TABLE {table} MODIFY {column} varbinary(32)')
+            schema_editor.execute(f'UPDATE {table} SET {column} = LOWER(HEX({column}))')
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        elif connection.vendor == 'sqlite':
+            self._convert(schema_editor, table, column, bytes, lambda value: uuid.UUID(bytes=value).hex)
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            raise NotSupportedError(f'AlterIDFieldToBinary does not support {connection.vendor}')
+
+    def _table_column(self, app_label, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        field = model._meta.get_field(self.name)
+        return model._meta.db_table, field.column
+
+    @staticmethod
+    def _convert(schema_editor, table, column, source_type, convert):
+        quote_name = schema_editor.quote_name
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT {quote_name(column)} FROM {quote_name(table)} WHERE {quote_name(column)} IS NOT NULL')
+            params = [(convert(value), value) for value, in cursor.fetchall() if isinstance(value, source_type)]
+            cursor.executemany(
+                f'UPDATE {quote_name(table)} SET {quote_name(column)} = %s WHERE {quote_name(column)} = %s', params
+            )
+
+
+class AlterChoicesToCompact(migrations.AlterField):
+    """
+    将已有的类型字段或状态字段改为整数编码存储
+
+    用于替换`makemigrations`为`TypeField(compact=True)`或`StatusField(compact=True)`生成的`AlterField`。
+    先在原字符串列中把选项值改写为编码的文本形式，再修改列类型，由数据库完成文本到整数的转换；
+    反向迁移时先修改列类型，再把编码改写回选项值。
+    改写使用一条`CASE`语句，选项值本身是数字文本时也不会与编码混淆。
+
+    迁移后按该字段排序的结果按编码即`choices`中的顺序排列，不再按选项值的字母顺序。
+
+    示例：
+
+    ```
+    operations = [
+        AlterChoicesToCompact(
+            model_name='project',
+            name='status',
+            field=StatusField(choices=[('draft', 'Draft'), ('published', 'Published')], compact=True),
+        ),
+    ]
+    ```
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        mapping = [(str(code), value) for value, code in self.field.choice_codes.items()]
+        self._rewrite(app_label, schema_editor, from_state, mapping)
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # AlterField.database_backwards调用的是正向迁移，这里直接修改列类型
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+        mapping = [(value, str(code)) for value, code in self.field.choice_codes.items()]
+        self._rewrite(app_label, schema_editor, to_state, mapping)
+
+    def _rewrite(self, app_label, schema_editor, state, mapping):
+        model = state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        quote_name = schema_editor.quote_name
+        table = quote_name(model._meta.db_table)
+        column = quote_name(model._meta.get_field(self.name).column)
+        if not mapping:
+            return
+        # 所有选项在一条语句中改写，逐个改写会把前面改写的结果当作选项值再次改写
+        cases = ' '.join(['WHEN %s THEN %s'] * len(mapping))
+        params = [value for new_value, old_value in mapping for value in (old_value, new_value)]
+        params += [old_value for new_value, old_value in mapping]
+        placeholders = ', '.join(['%s'] * len(mapping))
+        schema_editor.execute(
+            f'UPDATE {table} SET {column} = CASE {column} {cases} ELSE {column} END WHERE {column} IN ({placeholders})',
+            params,
+        )
@@ -1,15 +1,33 @@
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
 from polymorphic.models import PolymorphicModel as BasePolymorphicModel
 
 from django_quanttide.models import IDField, CreatedAtField, UpdatedAtField
+from django_quanttide.models.managers import PolymorphicManager
+from django_quanttide.models.models import DirtyFieldsMixin
 
 
-class PolymorphicModel(BasePolymorphicModel):
+# (数据库别名, ContentType主键)到类型值的缓存，异步读取已知类型时不切换线程
+_type_names = {}
+
+
+@receiver(post_migrate)
+def _clear_type_names(**kwargs):
+    # 与ContentType缓存一致，迁移和清空数据库后ContentType主键可能变化
+    _type_names.clear()
+
+
+class PolymorphicModel(DirtyFieldsMixin, BasePolymorphicModel):
     """
     多态数据模型
 
     类型字段映射表（TYPE_FIELD_MAPPINGS）是一个键值对字典，用于将模型名称（即 ContentType 表的 model 值）映射到用户定义的类型值。
     如果需要使用类型字段映射表，请在子类中覆盖 TYPE_FIELD_MAPPINGS 属性。
 
+    保存时只写入有变化的字段，参见`DirtyFieldsMixin`。
+
     示例：
 
     ```
@@ -19,6 +37,8 @@ class PolymorphicModel(BasePolymorphicModel):
     """
     id = IDField()
 
+    objects = PolymorphicManager()
+
     class Meta:
         abstract = True
 
@@ -29,7 +49,43 @@ class PolymorphicModel(BasePolymorphicModel):
 
         默认返回值为模型名称的小写形式，比如`parentmodel`、`childmodel`。
 
+        从进程内的ContentType缓存读取，每种类型只在首次访问时查询一次数据库，
+        列表序列化时不会逐行查询。
+
         :return: 类型值
         """
+        if self.polymorphic_ctype_id is None:
+            # 尚未保存时类型即当前模型
+            return self._meta.model_name
         # 类名转小写，方便和ContentType.model字段对应
-        return self.polymorphic_ctype.model
+        return ContentType.objects.db_manager(self._state.db).get_for_id(self.polymorphic_ctype_id).model
+
+    async def atype(self) -> str:
+        """
+        异步获取类型字段，参见`type`
+
+        类型已知或已加载`polymorphic_ctype`时直接返回，只在首次读取某种类型时切换线程。
+
+        :return: 类型值
+        """
+        if self.polymorphic_ctype_id is None:
+            return self._meta.model_name
+        key = (self._state.db, self.polymorphic_ctype_id)
+        try:
+            return _type_names[key]
+        except KeyError:
+            pass
+        content_type = self._state.fields_cache.get('polymorphic_ctype')
+        if content_type is None:
+            manager = ContentType.objects.db_manager(self._state.db)
+            content_type = await sync_to_async(manager.get_for_id)(self.polymorphic_ctype_id)
+        name = _type_names[key] = content_type.model
+        return name
+
+    async def aget_real_instance(self):
+        """
+        异步获取子类实例
+
+        :return: 子类实例
+        """
+        return await sync_to_async(self.get_real_instance)()
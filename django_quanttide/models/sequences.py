@@ -0,0 +1,241 @@
+"""
+编号分配器
+
+为`NumberField`分配编号。默认在PostgreSQL上使用原生序列，在其他数据库（包括SQLite）上使用行锁计数表，
+每次分配只访问一行已索引的数据，并发写入不会分配到相同编号。
+
+可以通过`QUANTTIDE_NUMBER_ALLOCATOR`配置项指定自定义分配器的导入路径，自定义分配器需继承`NumberAllocator`。
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import models, connections, transaction, IntegrityError
+from django.db.backends.utils import truncate_name
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class NumberSequence(models.Model):
+    """
+    编号计数表
+
+    每个`NumberField`对应一行，`value`为最近一次分配的编号。
+    """
+    key = models.CharField(max_length=255, primary_key=True, verbose_name='序列标识')
+    value = models.BigIntegerField(default=0, verbose_name='当前编号')
+
+    class Meta:
+        app_label = 'django_quanttide'
+        verbose_name = '编号序列'
+        verbose_name_plural = '编号序列列表'
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+def sequence_key(field) -> str:
+    """
+    编号字段在计数表和数据库序列中的标识
+
+    :param field: 编号字段
+    :return: 由数据表名和列名组成的标识
+    """
+    return f'{field.model._meta.db_table}_{field.column}'
+
+
+def current_max(field, using) -> int:
+    """
+    查询编号字段当前的最大值
+
+    编号字段带有唯一索引，聚合查询走索引，仅在初始化计数时调用。
+    """
+    value = field.model._base_manager.using(using).aggregate(value=models.Max(field.attname))['value']
+    return value or 0
+
+
+class NumberAllocator:
+    """
+    编号分配器基类
+
+    子类至少实现`reserve`方法；批量写入时一次预留一段编号，再在内存中逐个分配。
+    """
+
+    def allocate(self, field, using) -> int:
+        """
+        分配一个新编号
+
+        :param field: 编号字段
+        :param using: 数据库别名
+        :return: 新编号
+        """
+        return self.reserve(field, 1, using)[0]
+
+    def reserve(self, field, count, using):
+        """
+        预留一段编号
+
+        :param field: 编号字段
+        :param count: 编号数量
+        :param using: 数据库别名
+        :return: 按升序排列的编号序列
+        """
+        raise NotImplementedError('subclasses of NumberAllocator must provide a reserve() method')
+
+    def advance(self, field, value, using):
+        """
+        保证此后分配的编号大于`value`
+
+        写入指定编号的实例（如导入数据）后调用，避免此后分配到重复的编号。默认不做任何处理。
+
+        :param field: 编号字段
+        :param value: 已使用的编号
+        :param using: 数据库别名
+        """
+
+
+class CounterTableAllocator(NumberAllocator):
+    """
+    计数表分配器
+
+    用`UPDATE ... SET value = value + n`递增计数行，更新语句持有行锁直到事务结束，
+    并发分配因此被串行化，每次预留得到一段连续编号。计数行不存在时从字段当前最大值初始化。
+    """
+
+    def reserve(self, field, count, using):
+        key = sequence_key(field)
+        queryset = NumberSequence.objects.using(using).filter(key=key)
+        with transaction.atomic(using=using):
+            if not queryset.update(value=models.F('value') + count):
+                self._initialize(field, key, count, using)
+            value = queryset.values_list('value', flat=True).get()
+        return range(value - count + 1, value + 1)
+
+    def advance(self, field, value, using):
+        queryset = NumberSequence.objects.using(using).filter(key=sequence_key(field))
+        with transaction.atomic(using=using):
+            if not queryset.update(value=Greatest('value', value)):
+                # 计数行不存在时先从字段当前最大值初始化
+                self.reserve(field, 0, using)
+                queryset.update(value=Greatest('value', value))
+
+    def _initialize(self, field, key, count, using):
+        try:
+            with transaction.atomic(using=using):
+                NumberSequence.objects.using(using).create(key=key, value=current_max(field, using) + count)
+        except IntegrityError:
+            # 其他进程已经初始化了计数行
+            NumberSequence.objects.using(using).filter(key=key).update(value=models.F('value') + count)
+
+
+class SequenceAllocator(NumberAllocator):
+    """
+    PostgreSQL序列分配器
+
+    首次使用时创建序列并从字段当前最大值开始计数，此后每次预留只执行一条`nextval`语句。
+    并发预留时编号可能交错，但不会重复。
+    """
+
+    def __init__(self):
+        self._created = set()
+
+    def sequence_name(self, field, connection) -> str:
+        return truncate_name(f'{sequence_key(field)}_number_seq', connection.ops.max_name_length())
+
+    def reserve(self, field, count, using):
+        connection = connections[using]
+        name = self._ensure_sequence(field, using)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [name, count])
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def advance(self, field, value, using):
+        connection = connections[using]
+        name = self._ensure_sequence(field, using)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT setval(%s, GREATEST(%s, last_value)) FROM {connection.ops.quote_name(name)}', [name, value],
+            )
+
+    def _ensure_sequence(self, field, using):
+        name = self.sequence_name(field, connections[using])
+        if (using, name) not in self._created:
+            self._create_sequence(field, name, using)
+            self._created.add((using, name))
+        return name
+
+    def _create_sequence(self, field, name, using):
+        connection = connections[using]
+        quoted_name = connection.ops.quote_name(name)
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            # 加锁避免多个进程同时初始化序列起始值
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {quoted_name}')
+            cursor.execute(f'SELECT is_called FROM {quoted_name}')
+            if not cursor.fetchone()[0]:
+                value = current_max(field, using)
+                if value:
+                    cursor.execute('SELECT setval(%s, %s)', [name, value])
+
+
+@lru_cache(maxsize=None)
+def _load_allocator(path):
+    return import_string(path)()
+
+
+def get_number_allocator(connection) -> NumberAllocator:
+    """
+    获取数据库连接对应的编号分配器
+
+    :param connection: 数据库连接
+    :return: 编号分配器实例
+    """
+    path = getattr(settings, 'QUANTTIDE_NUMBER_ALLOCATOR', None)
+    if path is None:
+        if connection.vendor == 'postgresql':
+            path = 'django_quanttide.models.sequences.SequenceAllocator'
+        else:
+            path = 'django_quanttide.models.sequences.CounterTableAllocator'
+    return _load_allocator(path)
+
+
+@receiver(setting_changed)
+def _reset_allocators(setting, **kwargs):
+    if setting == 'QUANTTIDE_NUMBER_ALLOCATOR':
+        _load_allocator.cache_clear()
+
+
+def reserve_numbers(model, objs, using):
+    """
+    为一批模型实例分配编号
+
+    每个编号字段只预留一次，批量写入的查询数量与实例数量无关。
+    已指定编号的实例使分配器跳过这些编号，此后分配的编号不会与之重复。
+
+    :param model: 模型类
+    :param objs: 模型实例列表
+    :param using: 数据库别名
+    """
+    from .fields import NumberField
+
+    allocator = None
+    for field in model._meta.concrete_fields:
+        if not isinstance(field, NumberField):
+            continue
+        values = [getattr(obj, field.attname) for obj in objs]
+        pending = [obj for obj, value in zip(objs, values) if not value]
+        provided = [value for value in values if value]
+        if not pending and not provided:
+            continue
+        if allocator is None:
+            allocator = get_number_allocator(connections[using])
+        if provided:
+            allocator.advance(field, max(provided), using)
+        if pending:
+            for obj, value in zip(pending, allocator.reserve(field, len(pending), using)):
+                setattr(obj, field.attname, value)
+    # 插入时`NumberField.pre_save`不再逐个推进分配器
+    for obj in objs:
+        obj._state.numbers_reserved = True
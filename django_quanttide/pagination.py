@@ -0,0 +1,73 @@
+"""
+分页
+"""
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from django_quanttide.models.keyset import keyset_paginate
+
+
+class KeysetPagination(BasePagination):
+    """
+    键集分页
+
+    按`(created_at, id)`分页，使用不透明游标，任意页的查询代价与第一页相同，
+    数据模型需要用`django_quanttide.models.keyset_index`创建复合索引。
+
+    :param page_size: 每页数量，默认为20
+    :param max_page_size: 客户端可以请求的最大每页数量
+    :param descending: 是否按时间倒序，默认为True
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    descending = True
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            page = keyset_paginate(queryset, cursor, self.get_page_size(request), self.descending)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        self.next_cursor = page.next_cursor
+        return page.objects
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
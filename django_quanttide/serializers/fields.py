@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+
+class ChoiceLabelField(serializers.ChoiceField):
+    """
+    选项标签序列化字段
+
+    输出`{"value": 选项值, "label": 标签}`，标签从初始化时构建的选项字典中查找；
+    输入既可以是选项值，也可以是同样格式的字典。
+
+    在`ModelSerializer`中设置`serializer_choice_field = ChoiceLabelField`，
+    即可让`TypeField`、`StatusField`、`StageField`等选项字段输出标签。
+    """
+
+    def to_representation(self, value):
+        if value in ('', None):
+            return value
+        return {'value': value, 'label': self.choices.get(value, value)}
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            data = data.get('value')
+        return super().to_internal_value(data)
@@ -1,5 +1,90 @@
+from collections.abc import Mapping
+
+from django.db import models
+from rest_framework import serializers
 from rest_polymorphic.serializers import PolymorphicSerializer as BasePolymorphicSerializer
 
 
+class PolymorphicListSerializer(serializers.ListSerializer):
+    """
+    多态列表序列化器
+
+    逐行直接按模型类查找子序列化器，不经过`PolymorphicSerializer.to_representation`的逐行解析。
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        child = self.child
+        resource_type_field_name = child.resource_type_field_name
+        model_serializer_mapping = child.model_serializer_mapping
+        dispatch = child._dispatch
+        ret = []
+        for item in iterable:
+            if isinstance(item, Mapping):
+                ret.append(child.to_representation(item))
+                continue
+            model, resource_type = dispatch(item.__class__)
+            representation = model_serializer_mapping[model].to_representation(item)
+            representation[resource_type_field_name] = resource_type
+            ret.append(representation)
+        return ret
+
+
 class PolymorphicSerializer(BasePolymorphicSerializer):
-    pass
+    """
+    多态序列化器
+
+    模型类到（映射模型类，资源类型）的解析结果在类上缓存，每种模型类只沿MRO解析一次，
+    此后每行只需一次字典查找。
+    `many=True`时使用`PolymorphicListSerializer`，每个列表只实例化一组子序列化器；
+    子类的`Meta`显式指定`list_serializer_class`时使用指定的列表序列化器。
+
+    `to_resource_type`的返回值应只取决于模型类。
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_cache = {}
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # 与`BaseSerializer.many_init`相同地分配参数，只替换默认的列表序列化器类
+        list_kwargs = {}
+        for key in getattr(serializers, 'LIST_SERIALIZER_KWARGS_REMOVE', ('allow_empty',)):
+            value = kwargs.pop(key, None)
+            if value is not None:
+                list_kwargs[key] = value
+        list_kwargs['child'] = cls(*args, **kwargs)
+        list_kwargs.update({
+            key: value for key, value in kwargs.items()
+            if key in serializers.LIST_SERIALIZER_KWARGS
+        })
+        # 不依赖`Meta`，子类声明自己的`Meta`时同样生效
+        list_serializer_class = getattr(getattr(cls, 'Meta', None), 'list_serializer_class', None)
+        return (list_serializer_class or PolymorphicListSerializer)(*args, **list_kwargs)
+
+    def _dispatch(self, model):
+        """
+        解析模型类对应的映射模型类和资源类型
+
+        :param model: 模型类
+        :return: (映射模型类, 资源类型)
+        """
+        try:
+            return self._dispatch_cache[model]
+        except KeyError:
+            pass
+        for klass in model.mro():
+            if klass in self.model_serializer_mapping:
+                result = self._dispatch_cache[model] = (klass, self.to_resource_type(model))
+                return result
+        # 交给基类抛出缺少映射的异常
+        return self._get_serializer_from_model_or_instance(model)
+
+    def to_representation(self, instance):
+        if isinstance(instance, Mapping):
+            return super().to_representation(instance)
+        model, resource_type = self._dispatch(instance.__class__)
+        ret = self.model_serializer_mapping[model].to_representation(instance)
+        ret[self.resource_type_field_name] = resource_type
+        return ret
@@ -0,0 +1,261 @@
+"""
+流式导入导出
+
+按块读取模型的字段值并逐行写出为NDJSON或CSV，内存占用只与块大小有关，与行数无关。
+读取使用`values_list(...).iterator(chunk_size=...)`，在PostgreSQL等支持的数据库上使用服务器端游标，
+不构造模型实例，字段值直接转换为字符串或JSON值。
+
+多态模型的`polymorphic_ctype`导出为"<应用标签>.<模型名>"，不依赖各数据库中不同的ContentType主键。
+
+导入按块读取NDJSON或CSV，每块在一个事务中用`bulk_create`写入：保留给出的ID、编号、创建时间和更新时间，
+缺少编号的行一次预留整块的编号。多表继承的子模型不支持`bulk_create`，在同一事务中逐行插入。
+"""
+
+import csv
+import datetime
+import decimal
+import json
+import time
+import uuid
+from collections import namedtuple
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction, DEFAULT_DB_ALIAS
+
+from .models.fields import keep_timestamps
+from .models.sequences import reserve_numbers
+
+FORMATS = ('ndjson', 'csv')
+
+
+def export_fields(model, fields=None):
+    """
+    导出的字段
+
+    :param model: 模型类
+    :param fields: 字段名列表，默认为全部具体字段
+    :return: 字段列表
+    """
+    if fields is None:
+        return list(model._meta.concrete_fields)
+    return [model._meta.get_field(name) for name in fields]
+
+
+def _is_ctype_field(field):
+    return field.is_relation and field.related_model is ContentType
+
+
+def _serialize_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return value
+
+
+def _serialize_ctype(value):
+    if value is None:
+        return None
+    content_type = ContentType.objects.get_for_id(value)
+    return f'{content_type.app_label}.{content_type.model}'
+
+
+def iter_rows(queryset, fields=None, chunk_size=2000):
+    """
+    逐行读取字段值
+
+    :param queryset: 查询集
+    :param fields: 字段名列表，默认为全部具体字段
+    :param chunk_size: 每次从数据库读取的行数
+    :return: 字段名列表和逐行的值列表迭代器
+    """
+    fields = export_fields(queryset.model, fields)
+    names = [field.name for field in fields]
+    serializers = [_serialize_ctype if _is_ctype_field(field) else _serialize_value for field in fields]
+    # values_list不受多态查询和延迟加载影响，只读取需要的列
+    rows = queryset.values_list(*[field.attname for field in fields]).iterator(chunk_size=chunk_size)
+
+    def generate():
+        for row in rows:
+            yield [serialize(value) for serialize, value in zip(serializers, row)]
+
+    return names, generate()
+
+
+def export_ndjson(queryset, stream, fields=None, chunk_size=2000) -> int:
+    """
+    导出为NDJSON，每行一个JSON对象
+
+    :param queryset: 查询集
+    :param stream: 文本输出流
+    :param fields: 字段名列表，默认为全部具体字段
+    :param chunk_size: 每次从数据库读取的行数
+    :return: 导出的行数
+    """
+    names, rows = iter_rows(queryset, fields, chunk_size)
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    count = 0
+    for row in rows:
+        stream.write(encoder.encode(dict(zip(names, row))))
+        stream.write('\n')
+        count += 1
+    return count
+
+
+def export_csv(queryset, stream, fields=None, chunk_size=2000) -> int:
+    """
+    导出为CSV，首行为字段名，空值导出为空字符串
+
+    :param queryset: 查询集
+    :param stream: 文本输出流
+    :param fields: 字段名列表，默认为全部具体字段
+    :param chunk_size: 每次从数据库读取的行数
+    :return: 导出的行数
+    """
+    names, rows = iter_rows(queryset, fields, chunk_size)
+    writer = csv.writer(stream)
+    writer.writerow(names)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def export(queryset, stream, format='ndjson', fields=None, chunk_size=2000) -> int:
+    """
+    按格式导出
+
+    :param queryset: 查询集
+    :param stream: 文本输出流
+    :param format: 'ndjson'或'csv'
+    :param fields: 字段名列表，默认为全部具体字段
+    :param chunk_size: 每次从数据库读取的行数
+    :return: 导出的行数
+    """
+    if format == 'ndjson':
+        return export_ndjson(queryset, stream, fields, chunk_size)
+    if format == 'csv':
+        return export_csv(queryset, stream, fields, chunk_size)
+    raise ValueError(f'Unknown format {format!r}, expected one of {FORMATS}.')
+
+
+class LoadProgress(namedtuple('LoadProgress', ['rows', 'seconds'])):
+    """
+    导入进度
+
+    :param rows: 已写入的行数
+    :param seconds: 已用时间（秒）
+    """
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _deserialize_ctype(value):
+    if value is None:
+        return None
+    return ContentType.objects.get_by_natural_key(*value.split('.', 1)).pk
+
+
+def _deserialize_hex(value):
+    return None if value is None else bytes.fromhex(value)
+
+
+def _converter(model, name, empty_as_null):
+    field = model._meta.get_field(name)
+    if _is_ctype_field(field):
+        convert = _deserialize_ctype
+    else:
+        target = field.target_field if field.is_relation else field
+        convert = _deserialize_hex if isinstance(target, models.BinaryField) else target.to_python
+    if empty_as_null and field.null:
+        def convert_empty(value, convert=convert):
+            return None if value == '' else convert(value)
+        return field.attname, convert_empty
+    return field.attname, convert
+
+
+def _is_multi_table(model):
+    concrete_model = model._meta.concrete_model
+    return any(parent._meta.concrete_model is not concrete_model for parent in model._meta.get_parent_list())
+
+
+def load_rows(model, rows, batch_size=1000, using=DEFAULT_DB_ALIAS, progress=None, empty_as_null=False):
+    """
+    分块写入字段值字典
+
+    :param model: 模型类
+    :param rows: 字段名到值的字典的可迭代对象，值为导出格式
+    :param batch_size: 每块的行数，每块一个事务
+    :param using: 数据库别名
+    :param progress: 每块写入后调用，参数为`LoadProgress`
+    :param empty_as_null: 是否将允许为空的字段的空字符串视为空值，用于CSV
+    :return: `LoadProgress`
+    """
+    converters = {}
+    multi_table = _is_multi_table(model)
+    manager = model._base_manager.db_manager(using)
+    rows = iter(rows)
+    count = 0
+    start = time.perf_counter()
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        objs = []
+        for row in batch:
+            values = {}
+            for name, value in row.items():
+                if name not in converters:
+                    converters[name] = _converter(model, name, empty_as_null)
+                attname, convert = converters[name]
+                values[attname] = convert(value)
+            objs.append(model(**values))
+        with transaction.atomic(using=using), keep_timestamps():
+            reserve_numbers(model, objs, using)
+            if multi_table:
+                for obj in objs:
+                    obj.save(force_insert=True, using=using)
+            else:
+                manager.bulk_create(objs)
+        count += len(objs)
+        if progress is not None:
+            progress(LoadProgress(count, time.perf_counter() - start))
+    return LoadProgress(count, time.perf_counter() - start)
+
+
+def read_ndjson(stream):
+    """
+    逐行读取NDJSON，跳过空行
+
+    :param stream: 文本输入流
+    :return: 字典迭代器
+    """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def load(model, stream, format='ndjson', **kwargs) -> LoadProgress:
+    """
+    按格式导入
+
+    :param model: 模型类
+    :param stream: 文本输入流，CSV首行为字段名
+    :param format: 'ndjson'或'csv'
+    :param kwargs: 传给`load_rows`的参数
+    :return: `LoadProgress`
+    """
+    if format == 'ndjson':
+        return load_rows(model, read_ndjson(stream), **kwargs)
+    if format == 'csv':
+        kwargs.setdefault('empty_as_null', True)
+        return load_rows(model, csv.DictReader(stream), **kwargs)
+    raise ValueError(f'Unknown format {format!r}, expected one of {FORMATS}.')
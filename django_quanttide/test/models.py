@@ -1,15 +1,68 @@
+import re
+import statistics
+import time
+from collections import Counter
 from uuid import UUID
 
+from django.db import connections, router
 from django.db.models import Model
 from django.test import TestCase as BaseTestCase
+from django.test.utils import CaptureQueriesContext
+
+# SQL literals and savepoint names replaced when grouping repeated statements
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\"s\d+_x\d+\"")
+
+
+def repeated_statements(before: list, after: list) -> str:
+    """
+    Statements of `after` that ran more often than in `before`, one per line with the count of runs.
+
+    Both arguments are `CaptureQueriesContext.captured_queries` lists; literals are normalised away.
+    """
+    before = Counter(_SQL_LITERALS.sub('?', query['sql']) for query in before)
+    after = Counter(_SQL_LITERALS.sub('?', query['sql']) for query in after)
+    return '\n'.join(f'{count}x {sql}' for sql, count in after.most_common() if count > before[sql])
+
+
+def unique_data(model_class, data: dict, index: int) -> dict:
+    """
+    Copy of `data` with string values of unique fields suffixed by `index`.
+    """
+    data = dict(data)
+    for field in model_class._meta.concrete_fields:
+        if field.unique and not field.primary_key and isinstance(data.get(field.name), str):
+            data[field.name] = f'{data[field.name]}-{index}'
+    return data
 
 
 class ModelTestCase(BaseTestCase):
     """
     TestCase for testing Django Model classes.
+
+    Performance budgets are declared as class attributes and checked by `test_budgets`.
+    With `seed_rows` set, that many rows are inserted before measuring.
+
+    With `seed_sizes` set, `test_seed_scaling` seeds the table up to each size in turn,
+    saves and gets instances at each size and fails if the number of queries grows with the size,
+    reporting the statements that repeated, or if the median time per save or get grows
+    by more than `max_seconds_growth`. The measurements are kept in `seed_scaling`.
     """
     model_class: Model = Model
     model_data: dict = {}
+    # Maximum number of queries for saving a new instance, None for no limit
+    max_save_queries: int = None
+    # Maximum number of queries for getting an instance by primary key, None for no limit
+    max_get_queries: int = None
+    # Maximum wall time in seconds for saving a new instance, None for no limit
+    max_save_seconds: float = None
+    # Number of existing rows to seed before measuring
+    seed_rows: int = 0
+    # Table sizes for the save and get scaling test, e.g. (10, 200); empty to disable it
+    seed_sizes: tuple = ()
+    # Number of instances saved and got at each size, the median time is compared
+    scaling_repeats: int = 10
+    # Maximum ratio of the median time per save or get at the largest size to the smallest, None for no limit
+    max_seconds_growth: float = 4.0
 
     def test_defaults(self):
         # Test initializing a model instance
@@ -25,3 +78,103 @@ class ModelTestCase(BaseTestCase):
         self.assertEqual(model_instance, saved_instance)
         # Return it for more detailed tests
         return model_instance
+
+    def test_budgets(self):
+        budgets = (self.max_save_queries, self.max_get_queries, self.max_save_seconds)
+        if all(budget is None for budget in budgets) and not self.seed_rows:
+            return
+        self.seed()
+        connection = connections[router.db_for_write(self.model_class)]
+        model_instance = self.model_class(**self.model_data)
+        with CaptureQueriesContext(connection) as save_queries:
+            start = time.perf_counter()
+            model_instance.save()
+            save_seconds = time.perf_counter() - start
+        with CaptureQueriesContext(connection) as get_queries:
+            self.model_class.objects.get(pk=model_instance.pk)
+        if self.max_save_queries is not None:
+            self.assertLessEqual(len(save_queries), self.max_save_queries, self._format_queries(
+                f'save() executed {len(save_queries)} queries with {self.seed_rows} existing rows', save_queries))
+        if self.max_get_queries is not None:
+            self.assertLessEqual(len(get_queries), self.max_get_queries, self._format_queries(
+                f'get() executed {len(get_queries)} queries with {self.seed_rows} existing rows', get_queries))
+        if self.max_save_seconds is not None:
+            self.assertLessEqual(save_seconds, self.max_save_seconds,
+                                 f'save() took {save_seconds:.4f}s with {self.seed_rows} existing rows')
+        return model_instance
+
+    def test_seed_scaling(self):
+        if not self.seed_sizes:
+            return
+        connection = connections[router.db_for_write(self.model_class)]
+        manager = self.model_class._default_manager
+        self.seed_scaling = []
+        captured = []
+        for size in sorted(self.seed_sizes):
+            missing = size - manager.count()
+            if missing > 0:
+                self.seed(missing)
+            save_seconds, get_seconds = [], []
+            with CaptureQueriesContext(connection) as save_queries:
+                for _ in range(self.scaling_repeats):
+                    model_instance = self.model_class(**self.get_seed_data(manager.count()))
+                    start = time.perf_counter()
+                    model_instance.save()
+                    save_seconds.append(time.perf_counter() - start)
+            with CaptureQueriesContext(connection) as get_queries:
+                for _ in range(self.scaling_repeats):
+                    start = time.perf_counter()
+                    manager.get(pk=model_instance.pk)
+                    get_seconds.append(time.perf_counter() - start)
+            self.seed_scaling.append({
+                'size': size,
+                'save_queries': len(save_queries) / self.scaling_repeats,
+                'get_queries': len(get_queries) / self.scaling_repeats,
+                'save_seconds': statistics.median(save_seconds),
+                'get_seconds': statistics.median(get_seconds),
+            })
+            captured.append({'save': save_queries.captured_queries, 'get': get_queries.captured_queries})
+        smallest, largest = self.seed_scaling[0], self.seed_scaling[-1]
+        for operation in ('save', 'get'):
+            queries = f'{operation}_queries'
+            if largest[queries] > smallest[queries]:
+                self.fail(
+                    f'{operation}() queries grew from {smallest[queries]:g} at {smallest["size"]} rows '
+                    f'to {largest[queries]:g} at {largest["size"]} rows. Repeated statements:\n'
+                    + repeated_statements(captured[0][operation], captured[-1][operation])
+                )
+        if self.max_seconds_growth is not None:
+            for operation in ('save', 'get'):
+                seconds = f'{operation}_seconds'
+                self.assertLessEqual(
+                    largest[seconds], smallest[seconds] * self.max_seconds_growth,
+                    f'{operation}() took {largest[seconds] * 1000:.3f}ms at {largest["size"]} rows, '
+                    f'{smallest[seconds] * 1000:.3f}ms at {smallest["size"]} rows',
+                )
+
+    def get_seed_data(self, index: int) -> dict:
+        """
+        Data for the seeded row at `index`.
+
+        Defaults to `model_data` with string values of unique fields suffixed by the index.
+        """
+        return unique_data(self.model_class, self.model_data, index)
+
+    def seed(self, count: int = None):
+        """
+        Insert `count` existing rows, `seed_rows` by default.
+
+        Rows are indexed after the rows already in the table. Override it when rows need related objects.
+        """
+        if count is None:
+            count = self.seed_rows
+        if count:
+            offset = self.model_class._default_manager.count()
+            self.model_class.objects.bulk_create(
+                [self.model_class(**self.get_seed_data(offset + index)) for index in range(count)]
+            )
+
+    @staticmethod
+    def _format_queries(message, context):
+        queries = '\n'.join(f'{index}. {query["sql"]}' for index, query in enumerate(context.captured_queries, 1))
+        return f'{message}:\n{queries}'
@@ -1,13 +1,23 @@
+import time
+
+from django.db import connections, router
 from django.db.models import Model
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.serializers import BaseSerializer
 from rest_framework.test import APITestCase as BaseAPITestCase
 
+from .models import repeated_statements, unique_data
+
 
 class ViewSetAPITestCase(BaseAPITestCase):
     """
     Testing APIs provided by ViewSet and Router classes.
+
+    With `scaling_sizes` set, `test_list_scaling` seeds the model table up to each size in turn,
+    requests the list endpoint and fails if the number of queries grows with the size,
+    reporting the statements that repeated. The measurements are kept in `list_scaling`.
     """
 
     app_name: str = ''
@@ -15,6 +25,12 @@ class ViewSetAPITestCase(BaseAPITestCase):
     model_class: Model = Model
     serializer_class: BaseSerializer = BaseSerializer
     lookup_kwargs: dict = {}
+    # Table sizes for the list scaling test, e.g. (10, 200); empty to disable it
+    scaling_sizes: tuple = ()
+    # Data for seeded rows, unique string fields are suffixed by the row index
+    list_row_data: dict = {}
+    # Maximum list latency in seconds per row at the largest size, None for no limit
+    max_list_seconds_per_row: float = None
 
     @classmethod
     def setUpTestData(cls):
@@ -30,3 +46,51 @@ class ViewSetAPITestCase(BaseAPITestCase):
     def test_detail(self):
         response = self.client.get(self.detail_url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_scaling(self):
+        if not self.scaling_sizes:
+            return
+        connection = connections[router.db_for_read(self.model_class)]
+        self.list_scaling = []
+        captured = []
+        for size in sorted(self.scaling_sizes):
+            missing = size - self.model_class._default_manager.count()
+            if missing > 0:
+                self.seed_list(missing)
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = self.client.get(self.list_url, format='json')
+                elapsed = time.perf_counter() - start
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.list_scaling.append({
+                'size': size,
+                'queries': len(context),
+                'seconds': elapsed,
+                'seconds_per_row': elapsed / size,
+            })
+            captured.append(context.captured_queries)
+        smallest, largest = self.list_scaling[0], self.list_scaling[-1]
+        if largest['queries'] > smallest['queries']:
+            repeated = repeated_statements(captured[0], captured[-1])
+            self.fail(
+                f'list queries grew from {smallest["queries"]} at {smallest["size"]} rows '
+                f'to {largest["queries"]} at {largest["size"]} rows '
+                f'({largest["seconds_per_row"] * 1000:.3f}ms per row). Repeated statements:\n{repeated}'
+            )
+        if self.max_list_seconds_per_row is not None:
+            self.assertLessEqual(
+                largest['seconds_per_row'], self.max_list_seconds_per_row,
+                f'list took {largest["seconds_per_row"] * 1000:.3f}ms per row at {largest["size"]} rows',
+            )
+
+    def seed_list(self, count: int):
+        """
+        Insert `count` rows for the list scaling test.
+
+        Override it when rows need related objects or other setup.
+        """
+        offset = self.model_class._default_manager.count()
+        self.model_class.objects.bulk_create([
+            self.model_class(**unique_data(self.model_class, self.list_row_data, offset + index))
+            for index in range(count)
+        ])
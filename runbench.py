@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import argparse
+import json
+import os
+import sys
+
+import django
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.test.runner import DiscoverRunner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run django_quanttide benchmarks.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare with')
+    args = parser.parse_args()
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.settings'
+    django.setup()
+    import bench
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        results = bench.run(args.names)
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'] = bench.compare(json.load(f), results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
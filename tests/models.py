@@ -5,6 +5,14 @@ class ExampleNumberModel(models.Model):
     number = models.NumberField()
 
 
+class CachedManager(models.Manager):
+    object_cached = True
+
+
+class CachedPolymorphicManager(models.PolymorphicManager):
+    object_cached = True
+
+
 class ExampleModel(models.Model):
     number = models.NumberField()
     name = models.NameField()
@@ -18,9 +26,12 @@ class ExampleModel(models.Model):
     updated_at = models.UpdatedAtField()
     related_id = models.IDField(primary_key=False, verbose_name='关联ID')
 
+    objects = CachedManager()
+
     class Meta:
         verbose_name = '示例模型'
         verbose_name_plural = '示例模型列表'
+        indexes = [models.keyset_index('example_keyset_idx')]
 
 
 class BaseParentModel(models.PolymorphicModel):
@@ -34,8 +45,46 @@ class BaseChildModel(models.PolymorphicModel):
 
 
 class ParentModel(BaseParentModel):
-    pass
+    objects = CachedPolymorphicManager()
 
 
 class ChildModel(ParentModel):
-    pass
+    readme = models.ReadmeField()
+
+
+class ExampleBinaryIDModel(models.Model):
+    id = models.IDField(binary=True)
+    related_id = models.IDField(primary_key=False, binary=True, verbose_name='关联ID')
+
+
+class ExampleCompactModel(models.Model):
+    type = models.TypeField(choices=[('book', 'Book'), ('movie', 'Movie'), ('music', 'Music')], default='book',
+                            compact=True)
+    status = models.StatusField(choices=[('draft', 'Draft'), ('published', 'Published'), ('archived', 'Archived')],
+                                default='draft', compact=True)
+
+
+class ExampleReadmeModel(models.Model):
+    readme = models.ReadmeField(compressed=True, threshold=64)
+
+
+class ExampleCachedNameModel(models.Model):
+    name = models.NameField(cached=True)
+
+    objects = CachedManager()
+
+
+class ExampleAuditModel(models.Model):
+    name = models.NameField()
+    created_by = models.CreatedByField(related_name='+')
+    updated_by = models.UpdatedByField(related_name='+')
+
+
+class SlimAuditManager(models.Manager):
+    audit_user_fields = ['username']
+
+
+class ExampleSlimAuditModel(models.Model):
+    created_by = models.CreatedByField(related_name='+')
+
+    objects = SlimAuditManager()
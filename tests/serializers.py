@@ -0,0 +1,43 @@
+from rest_framework import serializers
+from rest_polymorphic.serializers import PolymorphicSerializer as BasePolymorphicSerializer
+
+from django_quanttide.serializers.polymorphic import PolymorphicSerializer
+
+from tests.models import ExampleModel, ExampleAuditModel, ParentModel, ChildModel
+
+
+class ParentModelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ParentModel
+        fields = ['id', 'type']
+
+
+class ChildModelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChildModel
+        fields = ['id', 'type']
+
+
+class ExamplePolymorphicSerializer(PolymorphicSerializer):
+    model_serializer_mapping = {
+        ParentModel: ParentModelSerializer,
+        ChildModel: ChildModelSerializer,
+    }
+
+
+class BaseExamplePolymorphicSerializer(BasePolymorphicSerializer):
+    model_serializer_mapping = ExamplePolymorphicSerializer.model_serializer_mapping
+
+
+class ExampleModelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExampleModel
+        fields = ['id', 'number', 'name', 'type', 'status', 'stage']
+
+
+class ExampleAuditModelSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source='created_by.username', default=None)
+
+    class Meta:
+        model = ExampleAuditModel
+        fields = ['id', 'name', 'created_by']
@@ -5,6 +5,7 @@
 SECRET_KEY = 'fake-key'
 
 INSTALLED_APPS = [
+    'django.contrib.auth',
     'django.contrib.contenttypes',
     'django_quanttide',
     "tests",
@@ -15,3 +16,5 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3"
     }
 }
+
+ROOT_URLCONF = 'tests.urls'
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+
+from django_quanttide import instrumentation
+from django_quanttide.instrumentation import execute_wrapper, query_models, record_queries
+from django_quanttide.middleware import QueryInstrumentationMiddleware
+
+from tests.models import ExampleModel, ChildModel
+
+metrics = []
+
+
+def collect_metrics(request, response, stats):
+    metrics.append(stats.as_dict())
+
+
+class QueryModelsTestCase(TestCase):
+    def test_query_models(self):
+        self.assertEqual(('tests.ExampleModel',), query_models('SELECT * FROM "tests_examplemodel" WHERE 1'))
+        self.assertEqual(
+            ('tests.ChildModel', 'tests.ParentModel'),
+            query_models('SELECT * FROM "tests_childmodel" INNER JOIN "tests_parentmodel" ON 1'),
+        )
+        self.assertEqual((), query_models('SELECT 1'))
+
+    def test_record_queries(self):
+        with connection.execute_wrapper(execute_wrapper), record_queries() as stats:
+            ExampleModel.objects.create(name='example')
+            ChildModel.objects.create().type
+        self.assertGreaterEqual(stats.count, max(count for count, seconds in stats.models.values()))
+        # 编号分配和ContentType查询同样计入
+        self.assertIn('django_quanttide.NumberSequence', stats.models)
+        self.assertIn('tests.ChildModel', stats.models)
+        self.assertGreater(stats.seconds, 0)
+
+    def test_outside_request(self):
+        with connection.execute_wrapper(execute_wrapper):
+            ExampleModel.objects.count()
+
+    @override_settings(QUANTTIDE_QUERY_INSTRUMENTATION=True)
+    def test_setup(self):
+        self.addCleanup(connection_created.disconnect, dispatch_uid='django_quanttide.instrumentation')
+        with mock.patch.object(connection, 'execute_wrappers', []):
+            instrumentation.setup()
+            instrumentation.setup()
+            self.assertEqual([execute_wrapper], connection.execute_wrappers)
+        self.assertTrue(connection_created.has_listeners())
+
+    def test_setup_disabled(self):
+        with mock.patch.object(connection, 'execute_wrappers', []):
+            instrumentation.setup()
+            self.assertEqual([], connection.execute_wrappers)
+
+
+class QueryInstrumentationMiddlewareTestCase(TestCase):
+    def view(self, request):
+        ExampleModel.objects.create(name='example')
+        list(ExampleModel.objects.all())
+        return HttpResponse()
+
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryInstrumentationMiddleware(self.view)
+
+    @override_settings(QUANTTIDE_QUERY_INSTRUMENTATION=True,
+                       QUANTTIDE_QUERY_METRICS_HOOK='tests.test_instrumentation.collect_metrics')
+    def test_server_timing(self):
+        metrics.clear()
+        middleware = QueryInstrumentationMiddleware(self.view)
+        with connection.execute_wrapper(execute_wrapper), self.assertLogs('django_quanttide.queries') as logs:
+            response = middleware(RequestFactory().get('/examples/'))
+        timing = response['Server-Timing']
+        self.assertTrue(timing.startswith('db;dur='))
+        self.assertIn('db.tests.examplemodel;dur=', timing)
+        self.assertEqual(1, len(metrics))
+        # 初始化编号计数时查询最大编号、插入、列表查询
+        self.assertEqual(3, metrics[0]['models']['tests.ExampleModel']['queries'])
+        self.assertEqual('/examples/', logs.records[0].path)
+        self.assertEqual(metrics[0]['queries'], logs.records[0].queries)
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+
+from django_quanttide.middleware import AuditUserMiddleware, get_current_user
+
+from tests.models import ExampleAuditModel
+
+
+class AuditUserMiddlewareTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = get_user_model().objects.create(username='alice')
+        cls.bob = get_user_model().objects.create(username='bob')
+
+    def request(self, user, view):
+        request = RequestFactory().post('/')
+        request.user = user
+        return AuditUserMiddleware(view)(request)
+
+    def test_create(self):
+        def view(request):
+            # 只执行INSERT，不查询用户
+            with self.assertNumQueries(1):
+                ExampleAuditModel.objects.create(name='example')
+            return HttpResponse()
+
+        self.request(self.alice, view)
+        instance = ExampleAuditModel.objects.get(name='example')
+        self.assertEqual(self.alice.pk, instance.created_by_id)
+        self.assertEqual(self.alice.pk, instance.updated_by_id)
+        self.assertIsNone(get_current_user())
+
+    def test_update(self):
+        instance = ExampleAuditModel.objects.create(name='example', created_by=self.alice, updated_by=self.alice)
+
+        def view(request):
+            instance.name = 'updated'
+            instance.save()
+            return HttpResponse()
+
+        self.request(self.bob, view)
+        instance = ExampleAuditModel.objects.get(pk=instance.pk)
+        self.assertEqual(self.alice.pk, instance.created_by_id)
+        self.assertEqual(self.bob.pk, instance.updated_by_id)
+
+    def test_anonymous(self):
+        def view(request):
+            ExampleAuditModel.objects.create(name='example')
+            return HttpResponse()
+
+        self.request(AnonymousUser(), view)
+        self.assertIsNone(ExampleAuditModel.objects.get(name='example').created_by_id)
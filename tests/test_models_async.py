@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from django_quanttide.models.cache import get_cache
+
+from tests.models import ExampleModel, ExampleCachedNameModel, ParentModel, ChildModel
+
+
+class AsyncManagerTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    async def test_acreate_number(self):
+        first = await ExampleModel.objects.acreate(name='first')
+        second = await ExampleModel.objects.acreate(name='second')
+        self.assertEqual([1, 2], [first.number, second.number])
+
+    async def test_aget_by_name(self):
+        instance = await ExampleCachedNameModel.objects.acreate(name='example')
+        self.assertEqual(instance.pk, await ExampleCachedNameModel.objects.aresolve_name('example'))
+        self.assertEqual(instance, await ExampleCachedNameModel.objects.aget_by_name('example'))
+        self.assertEqual({'example': instance}, await ExampleCachedNameModel.objects.aget_many_by_name(['example']))
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            await ExampleCachedNameModel.objects.aget_by_name('missing')
+
+    async def test_acached_get(self):
+        instance = await ExampleModel.objects.acreate(name='example')
+        self.assertEqual(instance, await ExampleModel.objects.acached_get(instance.pk))
+        self.assertEqual({instance.pk: instance}, await ExampleModel.objects.acached_in_bulk([instance.pk]))
+
+    async def test_abulk_upsert(self):
+        objs = await ExampleModel.objects.abulk_upsert([ExampleModel(name='example')])
+        self.assertEqual(1, objs[0].number)
+        self.assertEqual(1, await ExampleModel.objects.acount())
+
+
+class AsyncPolymorphicTestCase(TestCase):
+    async def test_astream(self):
+        parent = await ParentModel.objects.acreate()
+        child = await ChildModel.objects.acreate()
+        instances = [instance async for instance in ParentModel.objects.order_by('id').astream(chunk_size=1)]
+        self.assertEqual(sorted([parent, child], key=lambda instance: instance.pk), instances)
+        self.assertEqual({ParentModel, ChildModel}, {type(instance) for instance in instances})
+
+    async def test_atype(self):
+        child = await ChildModel.objects.acreate()
+        self.assertEqual('childmodel', await ChildModel(readme='').atype())
+        self.assertEqual('childmodel', await child.atype())
+        parent = await ParentModel.objects.non_polymorphic().aget(pk=child.pk)
+        self.assertEqual('childmodel', await parent.atype())
+        # 已知类型不再切换线程
+        with mock.patch('django_quanttide.models.polymorphic.sync_to_async', side_effect=AssertionError):
+            self.assertEqual('childmodel', await child.atype())
+            self.assertEqual('childmodel', await parent.atype())
+
+    async def test_aget_real_instance(self):
+        child = await ChildModel.objects.acreate()
+        parent = await ParentModel.objects.non_polymorphic().aget(pk=child.pk)
+        self.assertIsInstance(await parent.aget_real_instance(), ChildModel)
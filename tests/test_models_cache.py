@@ -0,0 +1,250 @@
+import uuid
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from django_quanttide.models import NameField
+from django_quanttide.models.cache import (
+    get_cache, name_cache_key, object_cache_key, cache_stats, reset_cache_stats, object_cache_enabled,
+    _generation_key, _version_key,
+)
+
+from tests.models import ExampleModel, ExampleNumberModel, ExampleCachedNameModel, ParentModel, ChildModel
+
+
+class NameCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [ExampleCachedNameModel.objects.create(name=f'example-{index}') for index in range(3)]
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_resolve_name_filtered(self):
+        ExampleCachedNameModel.objects.resolve_name('example-0')
+        # 缓存命中时同样遵守查询集的过滤条件
+        queryset = ExampleCachedNameModel.objects.exclude(pk=self.instances[0].pk)
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            queryset.resolve_name('example-0')
+        self.assertEqual({'example-1': self.instances[1].pk}, queryset.resolve_names(['example-0', 'example-1']))
+
+    def test_deconstruct(self):
+        self.assertTrue(NameField(cached=True).deconstruct()[3]['cached'])
+        self.assertNotIn('cached', NameField().deconstruct()[3])
+
+    def test_resolve_name(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.instances[0].pk, ExampleCachedNameModel.objects.resolve_name('example-0'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.instances[0].pk, ExampleCachedNameModel.objects.resolve_name('example-0'))
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            ExampleCachedNameModel.objects.resolve_name('missing')
+
+    def test_resolve_names(self):
+        ExampleCachedNameModel.objects.resolve_name('example-0')
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                {instance.name: instance.pk for instance in self.instances},
+                ExampleCachedNameModel.objects.resolve_names(['example-0', 'example-1', 'example-2', 'missing']),
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(3, len(ExampleCachedNameModel.objects.resolve_names(
+                ['example-0', 'example-1', 'example-2'])))
+
+    def test_get_by_name(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.instances[1], ExampleCachedNameModel.objects.get_by_name('example-1'))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.instances[1], ExampleCachedNameModel.objects.get_by_name('example-1'))
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            ExampleCachedNameModel.objects.get_by_name('missing')
+
+    def test_get_many_by_name(self):
+        ExampleCachedNameModel.objects.resolve_names(['example-0', 'example-1'])
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                {instance.name: instance for instance in self.instances},
+                ExampleCachedNameModel.objects.get_many_by_name(['example-0', 'example-1', 'example-2', 'missing']),
+            )
+
+    def test_invalidate_on_rename(self):
+        instance = ExampleCachedNameModel.objects.get_by_name('example-0')
+        instance.name = 'renamed'
+        instance.save()
+        field = ExampleCachedNameModel._meta.get_field('name')
+        self.assertIsNone(get_cache().get(name_cache_key(field, 'example-0')))
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            ExampleCachedNameModel.objects.resolve_name('example-0')
+        self.assertEqual(instance.pk, ExampleCachedNameModel.objects.resolve_name('renamed'))
+
+    def test_invalidate_on_delete(self):
+        ExampleCachedNameModel.objects.resolve_name('example-2')
+        ExampleCachedNameModel.objects.get(name='example-2').delete()
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            ExampleCachedNameModel.objects.resolve_name('example-2')
+
+    def test_stale_entry(self):
+        # 绕过信号的修改不会返回错误的实例
+        ExampleCachedNameModel.objects.resolve_name('example-0')
+        ExampleCachedNameModel.objects.filter(name='example-0').update(name='updated')
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            ExampleCachedNameModel.objects.get_by_name('example-0')
+        self.assertEqual('updated', ExampleCachedNameModel.objects.get_by_name('updated').name)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'names': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'names'},
+    }, QUANTTIDE_CACHE_ALIAS='names')
+    def test_cache_alias(self):
+        ExampleCachedNameModel.objects.resolve_name('example-0')
+        field = ExampleCachedNameModel._meta.get_field('name')
+        self.assertEqual(self.instances[0].pk, get_cache().get(name_cache_key(field, 'example-0')))
+
+    def test_not_cached(self):
+        ExampleModel.objects.create(name='example')
+        ExampleModel.objects.resolve_name('example')
+        with self.assertNumQueries(1):
+            self.assertEqual('example', ExampleModel.objects.get_by_name('example').name)
+
+
+class ObjectCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [ExampleModel.objects.create(name=f'example-{index}', description='description')
+                         for index in range(3)]
+
+    def setUp(self):
+        get_cache().clear()
+        reset_cache_stats()
+
+    def test_cached_get(self):
+        instance = self.instances[0]
+        with self.assertNumQueries(1):
+            self.assertEqual(instance, ExampleModel.objects.cached_get(instance.pk))
+        with self.assertNumQueries(0):
+            cached = ExampleModel.objects.cached_get(str(instance.pk))
+            self.assertEqual(instance, cached)
+            self.assertEqual('description', cached.description)
+        self.assertEqual({'hits': 1, 'misses': 1}, cache_stats(ExampleModel))
+        with self.assertRaises(ExampleModel.DoesNotExist):
+            ExampleModel.objects.cached_get(uuid.uuid4())
+
+    def test_cached_in_bulk(self):
+        ExampleModel.objects.cached_get(self.instances[1].pk)
+        pks = [instance.pk for instance in reversed(self.instances)] + [uuid.uuid4()]
+        with self.assertNumQueries(1):
+            objects = ExampleModel.objects.cached_in_bulk(pks)
+        self.assertEqual(pks[:3], list(objects))
+        self.assertEqual({'hits': 1, 'misses': 4}, cache_stats())
+        with self.assertNumQueries(0):
+            self.assertEqual(3, len(ExampleModel.objects.cached_in_bulk(pks[:3])))
+
+    def test_invalidate_on_save(self):
+        instance = ExampleModel.objects.cached_get(self.instances[0].pk)
+        instance.title = 'changed'
+        instance.save(update_fields=['title'])
+        with self.assertNumQueries(1):
+            self.assertEqual('changed', ExampleModel.objects.cached_get(instance.pk).title)
+
+    def test_invalidate_on_delete(self):
+        pk = self.instances[2].pk
+        ExampleModel.objects.cached_get(pk)
+        ExampleModel.objects.get(pk=pk).delete()
+        with self.assertRaises(ExampleModel.DoesNotExist):
+            ExampleModel.objects.cached_get(pk)
+
+    def test_invalidate_on_update(self):
+        pks = [instance.pk for instance in self.instances]
+        ExampleModel.objects.cached_in_bulk(pks)
+        ExampleModel.objects.filter(pk=pks[0]).update(title='updated')
+        self.assertEqual('updated', ExampleModel.objects.cached_in_bulk(pks)[pks[0]].title)
+
+    def test_version_evicted(self):
+        pk = self.instances[0].pk
+        ExampleModel.objects.cached_get(pk)
+        ExampleModel.objects.filter(pk=pk).update(title='updated')
+        # 版本号被淘汰时条目同样失效
+        self.assertTrue(get_cache().delete(_generation_key(ExampleModel, 'default')))
+        with self.assertNumQueries(1):
+            self.assertEqual('updated', ExampleModel.objects.cached_get(pk).title)
+
+    def test_version_evicted_before_write(self):
+        pk = self.instances[0].pk
+        ExampleModel.objects.cached_get(pk)
+        self.assertTrue(get_cache().delete(_generation_key(ExampleModel, 'default')))
+        self.assertTrue(get_cache().delete(_version_key(ExampleModel, 'default', pk)))
+        with self.assertNumQueries(1):
+            ExampleModel.objects.cached_get(pk)
+        with self.assertNumQueries(0):
+            ExampleModel.objects.cached_get(pk)
+
+    def test_opt_in(self):
+        self.assertTrue(object_cache_enabled(ExampleModel))
+        # 多表继承的子类随父类启用
+        self.assertTrue(object_cache_enabled(ChildModel))
+        self.assertFalse(object_cache_enabled(ExampleNumberModel))
+        # 未启用的模型写入时不访问缓存
+        with mock.patch('django_quanttide.models.cache.get_cache', side_effect=AssertionError):
+            instance = ExampleNumberModel.objects.create()
+            ExampleNumberModel.objects.filter(pk=instance.pk).update(number=5)
+            instance.delete()
+        with self.assertRaises(TypeError):
+            ExampleNumberModel.objects.cached_get(instance.pk)
+
+    def test_filtered(self):
+        with self.assertRaises(TypeError):
+            ExampleModel.objects.filter(name='example-0').cached_get(self.instances[0].pk)
+
+    def test_polymorphic(self):
+        child = ChildModel.objects.create(readme='readme')
+        self.assertIsInstance(ParentModel.objects.cached_get(child.pk), ChildModel)
+        child.readme = 'changed'
+        child.save()
+        with self.assertNumQueries(2):
+            self.assertEqual('changed', ParentModel.objects.cached_get(child.pk).readme)
+        self.assertNotEqual(object_cache_key(ParentModel, 'default', child.pk),
+                            object_cache_key(ChildModel, 'default', child.pk))
+
+    def test_get_by_name(self):
+        ExampleCachedNameModel.objects.create(name='cached')
+        ExampleCachedNameModel.objects.get_by_name('cached')
+        ExampleCachedNameModel.objects.get_by_name('cached')
+        with self.assertNumQueries(0):
+            self.assertEqual('cached', ExampleCachedNameModel.objects.get_by_name('cached').name)
+
+
+class ObjectCacheTransactionTestCase(TransactionTestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_stale_fill_during_transaction(self):
+        instance = ExampleModel.objects.create(name='example', title='before')
+        with transaction.atomic():
+            instance.title = 'after'
+            instance.save()
+            # 事务提交前其他请求读到旧数据并写入缓存
+            stale = ExampleModel.objects.get(pk=instance.pk)
+            stale.title = 'before'
+            key = object_cache_key(ExampleModel, 'default', instance.pk)
+            ExampleModel.objects.cached_get(instance.pk)
+            generation, version, _ = get_cache().get(key)
+            get_cache().set(key, (generation, version, stale))
+        self.assertEqual('after', ExampleModel.objects.cached_get(instance.pk).title)
+
+
+class NameCacheTransactionTestCase(TransactionTestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_stale_name_during_transaction(self):
+        instance = ExampleCachedNameModel.objects.create(name='before')
+        field = ExampleCachedNameModel._meta.get_field('name')
+        with transaction.atomic():
+            instance.name = 'after'
+            instance.save()
+            # 事务提交前其他请求读到旧标识并写入缓存
+            get_cache().set(name_cache_key(field, 'before'), instance.pk)
+        self.assertIsNone(get_cache().get(name_cache_key(field, 'before')))
+        with self.assertRaises(ExampleCachedNameModel.DoesNotExist):
+            ExampleCachedNameModel.objects.resolve_name('before')
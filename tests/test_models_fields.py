@@ -1,17 +1,25 @@
 import uuid
 
-from django.test import SimpleTestCase, TestCase, modify_settings
+from django.test import SimpleTestCase, TestCase, modify_settings, override_settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldError
+from django.db import connection
 
 from django_quanttide.models import (
-    IDField, NumberField, NameField,
+    IDField, uuid7, NumberField, NameField,
     VerboseNameField, TitleField, DescriptionField, ReadmeField,
     TypeField, StatusField, StageField, StageChoices,
     CreatedAtField, UpdatedAtField,
     CreatedByField, UpdatedByField,
+    NumberSequence,
 )
+from django_quanttide.models.sequences import NumberAllocator, sequence_key
 
-from tests.models import ExampleNumberModel
+from django_quanttide.models.compression import RAW, register_codec
+
+from tests.models import (
+    ExampleModel, ExampleNumberModel, ExampleBinaryIDModel, ExampleCompactModel, ExampleReadmeModel,
+)
 
 
 class IDFieldTestCase(SimpleTestCase):
@@ -41,6 +49,50 @@ class IDFieldTestCase(SimpleTestCase):
         name, path, args, kwargs = field.deconstruct()
         self.assertIsNone(kwargs['default'])
 
+    def test_time_ordered(self):
+        field = IDField(time_ordered=True)
+        self.assertIs(field.default, uuid7)
+        name, path, args, kwargs = field.deconstruct()
+        self.assertIs(kwargs['default'], uuid7)
+        self.assertNotIn('time_ordered', kwargs)
+
+    def test_uuid7(self):
+        values = [uuid7() for _ in range(100)]
+        for value in values:
+            self.assertIsInstance(value, uuid.UUID)
+            self.assertEqual(7, value.version)
+            self.assertEqual(uuid.RFC_4122, value.variant)
+        # 前48位为毫秒时间戳，按时间递增
+        timestamps = [value.int >> 80 for value in values]
+        self.assertEqual(sorted(timestamps), timestamps)
+
+
+class BinaryIDFieldTestCase(TestCase):
+    def test_deconstruct(self):
+        field = IDField(binary=True)
+        name, path, args, kwargs = field.deconstruct()
+        self.assertTrue(kwargs['binary'])
+        self.assertNotIn('binary', IDField().deconstruct()[3])
+
+    def test_db_type(self):
+        field = IDField(binary=True)
+        self.assertEqual('BLOB', field.db_type(connection))
+        self.assertEqual(uuid.UUID(int=1).bytes, field.get_db_prep_value(uuid.UUID(int=1), connection))
+
+    def test_round_trip(self):
+        related_id = uuid.uuid4()
+        instance = ExampleBinaryIDModel.objects.create(related_id=related_id)
+        saved_instance = ExampleBinaryIDModel.objects.get(pk=instance.pk)
+        self.assertIsInstance(saved_instance.pk, uuid.UUID)
+        self.assertEqual(instance.pk, saved_instance.pk)
+        self.assertEqual(related_id, saved_instance.related_id)
+        self.assertEqual(instance, ExampleBinaryIDModel.objects.get(related_id=str(related_id)))
+        self.assertEqual([instance.pk], list(
+            ExampleBinaryIDModel.objects.filter(pk__in=[instance.pk]).values_list('pk', flat=True)))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT related_id FROM {ExampleBinaryIDModel._meta.db_table}')
+            self.assertEqual(related_id.bytes, cursor.fetchone()[0])
+
 
 class NumberFieldTestCase(TestCase):
     def test_init(self):
@@ -56,6 +108,51 @@ class NumberFieldTestCase(TestCase):
         instance2 = ExampleNumberModel.objects.create()
         self.assertEqual(2, instance2.number)
 
+    def test_pre_save_counter(self):
+        ExampleNumberModel.objects.create(number=10)
+        # 计数行从当前最大值初始化
+        instance = ExampleNumberModel.objects.create()
+        self.assertEqual(11, instance.number)
+        field = ExampleNumberModel._meta.get_field('number')
+        self.assertEqual(11, NumberSequence.objects.get(key=sequence_key(field)).value)
+        # 计数行存在时只递增计数行，与表中数据量无关
+        with self.assertNumQueries(5):
+            # SAVEPOINT、UPDATE、SELECT、RELEASE SAVEPOINT、INSERT
+            instance2 = ExampleNumberModel.objects.create()
+        self.assertEqual(12, instance2.number)
+
+    def test_pre_save_explicit_number(self):
+        # 显式指定的编号推进计数行，此后分配的编号不会重复
+        self.assertEqual(1, ExampleNumberModel.objects.create().number)
+        ExampleNumberModel.objects.create(number=3)
+        self.assertEqual([4, 5], [ExampleNumberModel.objects.create().number for _ in range(2)])
+        ExampleNumberModel.objects.create(number=2)
+        self.assertEqual(6, ExampleNumberModel.objects.create().number)
+
+    def test_pre_save_changed_number(self):
+        instance = ExampleNumberModel.objects.create()
+        self.assertEqual(1, instance.number)
+        # 更新时修改编号同样推进分配器
+        instance.number = 50
+        instance.save()
+        self.assertEqual(51, ExampleNumberModel.objects.create().number)
+        # 编号未修改时不推进分配器
+        with self.assertNumQueries(0):
+            instance.save()
+        instance.number = 10
+        instance.save()
+        self.assertEqual(52, ExampleNumberModel.objects.create().number)
+
+    @override_settings(QUANTTIDE_NUMBER_ALLOCATOR='tests.test_models_fields.ConstantAllocator')
+    def test_custom_allocator(self):
+        instance = ExampleNumberModel.objects.create()
+        self.assertEqual(42, instance.number)
+
+
+class ConstantAllocator(NumberAllocator):
+    def reserve(self, field, count, using):
+        return range(42, 42 + count)
+
 
 class NameFieldTestCase(SimpleTestCase):
     def test_defaults(self):
@@ -141,6 +238,48 @@ class ReadmeFieldTestCase(SimpleTestCase):
         self.assertEqual(field.verbose_name, '关联简介')
 
 
+class CompressedReadmeFieldTestCase(TestCase):
+    readme = '# Readme\n\n' + '- item: repetitive markdown text\n' * 100
+
+    def test_deconstruct(self):
+        name, path, args, kwargs = ReadmeField(compressed=True, codec='lzma').deconstruct()
+        self.assertTrue(kwargs['compressed'])
+        self.assertEqual('lzma', kwargs['codec'])
+        self.assertNotIn('threshold', kwargs)
+        self.assertNotIn('compressed', ReadmeField().deconstruct()[3])
+        self.assertEqual('BLOB', ReadmeField(compressed=True).db_type(connection))
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            ReadmeField(compressed=True, codec='unknown')
+
+    def test_round_trip(self):
+        instance = ExampleReadmeModel.objects.create(readme=self.readme)
+        self.assertEqual(self.readme, ExampleReadmeModel.objects.with_large_fields().get(pk=instance.pk).readme)
+        self.assertEqual([self.readme], list(ExampleReadmeModel.objects.values_list('readme', flat=True)))
+        self.assertTrue(ExampleReadmeModel.objects.filter(readme=self.readme).exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT readme FROM {ExampleReadmeModel._meta.db_table}')
+            data = cursor.fetchone()[0]
+        # 首字节为zlib编码标识
+        self.assertEqual(1, data[0])
+        self.assertLess(len(data), len(self.readme) / 10)
+
+    def test_threshold(self):
+        field = ExampleReadmeModel._meta.get_field('readme')
+        self.assertEqual(bytes([RAW]) + b'short', field.get_db_prep_value('short', connection))
+        self.assertIsNone(field.get_db_prep_value(None, connection))
+        instance = ExampleReadmeModel.objects.create(readme='short')
+        self.assertEqual('short', ExampleReadmeModel.objects.get(pk=instance.pk).readme)
+        instance = ExampleReadmeModel.objects.create(readme=None)
+        self.assertIsNone(ExampleReadmeModel.objects.get(pk=instance.pk).readme)
+
+    def test_register_codec(self):
+        with self.assertRaises(ValueError):
+            register_codec('other', 1, bytes, bytes)
+        with self.assertRaises(ValueError):
+            register_codec('other', 256, bytes, bytes)
+
 
 class TypeFieldTestCase(SimpleTestCase):
 
@@ -173,12 +312,66 @@ class StatusFieldTestCase(SimpleTestCase):
         self.assertEqual(field.verbose_name, '状态')
 
 
+class CompactChoicesTestCase(TestCase):
+    def test_defaults(self):
+        field = TypeField(choices=[('book', 'Book'), ('movie', 'Movie')], default='book', compact=True)
+        self.assertEqual({'book': 1, 'movie': 2}, field.choice_codes)
+        self.assertEqual('SmallIntegerField', field.get_internal_type())
+        self.assertEqual('smallint', field.db_type(connection))
+        name, path, args, kwargs = field.deconstruct()
+        self.assertTrue(kwargs['compact'])
+        self.assertNotIn('compact', TypeField(choices=[('book', 'Book')], default='book').deconstruct()[3])
+
+    def test_round_trip(self):
+        instance = ExampleCompactModel.objects.create(type='movie', status='published')
+        saved_instance = ExampleCompactModel.objects.get(pk=instance.pk)
+        self.assertEqual('movie', saved_instance.type)
+        self.assertEqual('published', saved_instance.status)
+        self.assertEqual([instance], list(ExampleCompactModel.objects.filter(type__in=['movie', 'music'])))
+        self.assertEqual([('movie', 'published')], list(ExampleCompactModel.objects.values_list('type', 'status')))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT type, status FROM {ExampleCompactModel._meta.db_table}')
+            self.assertEqual((2, 2), cursor.fetchone())
+
+    def test_invalid_choice(self):
+        ExampleCompactModel.objects.create(type='movie')
+        # 查询不存在的选项值返回空结果，保存时抛出异常
+        self.assertFalse(ExampleCompactModel.objects.filter(type='game').exists())
+        self.assertEqual(['movie'], list(ExampleCompactModel.objects.filter(type__in=['movie', 'game'])
+                                         .values_list('type', flat=True)))
+        self.assertFalse(ExampleCompactModel.objects.filter(type__in=['game']).exists())
+        self.assertEqual(1, ExampleCompactModel.objects.exclude(type='game').count())
+        with self.assertRaises(ValueError):
+            ExampleCompactModel.objects.create(type='game')
+
+    def test_unsupported_lookups(self):
+        ExampleCompactModel.objects.create(type='movie')
+        self.assertEqual(1, ExampleCompactModel.objects.filter(type__isnull=False).count())
+        for lookup in ('icontains', 'startswith', 'gt'):
+            with self.assertRaises(FieldError):
+                ExampleCompactModel.objects.filter(**{f'type__{lookup}': 'mov'}).exists()
+        # 未紧凑存储的字段不受影响
+        self.assertFalse(ExampleModel.objects.filter(type__icontains='mov').exists())
+
+
 class StageFieldTestCase(SimpleTestCase):
     def test_defaults(self):
         field = StageField()
         self.assertIsInstance(field, StageField)
         self.assertEqual(field.choices, StageChoices.choices)
         self.assertEqual(field.default, StageChoices.PLANNING)
+        self.assertEqual('公测', field.choice_labels[StageChoices.BETA])
+
+
+class ChoiceLabelTestCase(SimpleTestCase):
+    def test_get_display(self):
+        instance = ExampleModel(type='movie', status='archived', stage=StageChoices.STABLE)
+        self.assertEqual('Movie', instance.get_type_display())
+        self.assertEqual('Archived', instance.get_status_display())
+        self.assertEqual('稳定', instance.get_stage_display())
+        # 未知选项值原样返回
+        instance.type = 'game'
+        self.assertEqual('game', instance.get_type_display())
 
 
 class CreatedAtFieldTestCase(SimpleTestCase):
@@ -0,0 +1,230 @@
+import warnings
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_quanttide.models import PolymorphicQuerySet
+from django_quanttide.models.fields import DeferredFieldLoadWarning, deferred_field_loads
+from tests.models import (
+    ExampleModel, ExampleNumberModel, ParentModel, ChildModel,
+    ExampleAuditModel, ExampleSlimAuditModel,
+)
+
+
+class BulkCreateTestCase(TestCase):
+    def test_bulk_create_numbers(self):
+        ExampleNumberModel.objects.create()
+        objs = ExampleNumberModel.objects.bulk_create([ExampleNumberModel() for _ in range(10)])
+        self.assertEqual(list(range(2, 12)), [obj.number for obj in objs])
+        self.assertEqual(list(range(1, 12)), list(
+            ExampleNumberModel.objects.order_by('number').values_list('number', flat=True)))
+
+    def test_bulk_create_queries(self):
+        ExampleNumberModel.objects.create()
+        # SAVEPOINT、UPDATE、SELECT、RELEASE SAVEPOINT、INSERT，与实例数量无关
+        with self.assertNumQueries(5):
+            ExampleNumberModel.objects.bulk_create([ExampleNumberModel() for _ in range(10)])
+        with self.assertNumQueries(5):
+            ExampleNumberModel.objects.bulk_create([ExampleNumberModel() for _ in range(100)])
+
+    def test_bulk_create_keeps_numbers(self):
+        objs = ExampleNumberModel.objects.bulk_create([ExampleNumberModel(number=5), ExampleNumberModel()])
+        self.assertEqual([5, 6], [obj.number for obj in objs])
+
+    def test_bulk_create_polymorphic(self):
+        objs = ParentModel.objects.bulk_create([ParentModel() for _ in range(3)])
+        self.assertEqual(3, ParentModel.objects.count())
+        self.assertEqual(['parentmodel'] * 3, [obj.type for obj in objs])
+
+
+class PolymorphicStreamTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for _ in range(5):
+            ParentModel.objects.create()
+            ChildModel.objects.create()
+
+    def test_stream(self):
+        expected = list(ParentModel.objects.order_by('id'))
+        instances = list(ParentModel.objects.order_by('id').stream(chunk_size=4))
+        self.assertEqual(expected, instances)
+        self.assertEqual([type(instance) for instance in expected], [type(instance) for instance in instances])
+
+    def test_stream_queries(self):
+        ContentType.objects.get_for_model(ChildModel)
+        get_real_instances = PolymorphicQuerySet._get_real_instances
+        chunks = []
+
+        def spy(queryset, base_objects):
+            chunks.append(len(base_objects))
+            return get_real_instances(queryset, base_objects)
+
+        # 基类查询一次，按块查询子类型，每块最多查询一次
+        with CaptureQueriesContext(connection) as context, \
+                mock.patch.object(PolymorphicQuerySet, '_get_real_instances', autospec=True, side_effect=spy):
+            for _ in ParentModel.objects.order_by('id').stream(chunk_size=4):
+                pass
+        self.assertEqual([4, 4, 2], chunks)
+        self.assertLessEqual(len(context), 1 + len(chunks))
+
+    def test_stream_non_polymorphic(self):
+        instances = list(ParentModel.objects.non_polymorphic().stream(chunk_size=4))
+        self.assertEqual(10, len(instances))
+        self.assertEqual({ParentModel}, {type(instance) for instance in instances})
+
+
+class AuditManagerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(username='alice', email='alice@example.com')
+        for index in range(3):
+            ExampleAuditModel.objects.create(name=f'example-{index}', created_by=cls.user, updated_by=cls.user)
+            ExampleSlimAuditModel.objects.create(created_by=cls.user)
+
+    def test_select_related(self):
+        with self.assertNumQueries(1):
+            for instance in ExampleAuditModel.objects.all():
+                self.assertEqual('alice', instance.created_by.username)
+                self.assertEqual('alice', instance.updated_by.username)
+
+    def test_slim_user_fields(self):
+        instances = list(ExampleSlimAuditModel.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(['alice'] * 3, [instance.created_by.username for instance in instances])
+        self.assertEqual({'email', 'password', 'last_login', 'first_name', 'last_name', 'is_superuser', 'is_staff',
+                          'is_active', 'date_joined'}, instances[0].created_by.get_deferred_fields())
+
+    def test_without_audit(self):
+        with self.assertNumQueries(4):
+            for instance in ExampleAuditModel.objects.select_related(None):
+                instance.created_by
+
+    def test_only(self):
+        # 未加载的审计字段不再关联查询
+        with self.assertNumQueries(1):
+            self.assertEqual(['example-0', 'example-1', 'example-2'],
+                             sorted(instance.name for instance in ExampleAuditModel.objects.only('name')))
+        with self.assertNumQueries(1):
+            for instance in ExampleAuditModel.objects.only('name', 'created_by'):
+                self.assertEqual('alice', instance.created_by.username)
+        self.assertEqual(3, len(ExampleSlimAuditModel.objects.only('id')))
+
+    def test_defer(self):
+        with self.assertNumQueries(1):
+            for instance in ExampleAuditModel.objects.defer('created_by'):
+                self.assertEqual('alice', instance.updated_by.username)
+        self.assertEqual({'created_by_id'}, instance.get_deferred_fields())
+        self.assertEqual(3, len(ExampleSlimAuditModel.objects.defer('created_by')))
+
+    def test_select_for_update(self):
+        # 不对审计用户的外连接加锁
+        queryset = ExampleAuditModel.objects.select_for_update()
+        self.assertFalse(queryset.query.select_related)
+        with transaction.atomic():
+            self.assertEqual(3, len(queryset))
+        # 显式指定加锁的表时保留关联查询
+        queryset = ExampleAuditModel.objects.select_for_update(of=('self',))
+        self.assertEqual({'created_by': {}, 'updated_by': {}}, queryset.query.select_related)
+
+
+class LargeFieldsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            ExampleModel.objects.create(name=f'example-{index}', description='description')
+        ChildModel.objects.create(readme='readme')
+
+    def test_deferred(self):
+        for instance in ExampleModel.objects.all():
+            self.assertEqual({'description'}, instance.get_deferred_fields())
+
+    def test_with_large_fields(self):
+        with self.assertNumQueries(1), warnings.catch_warnings():
+            warnings.simplefilter('error', DeferredFieldLoadWarning)
+            for instance in ExampleModel.objects.with_large_fields():
+                self.assertEqual('description', instance.description)
+
+    def test_get(self):
+        with self.assertNumQueries(1):
+            self.assertEqual('description', ExampleModel.objects.get(name='example-0').description)
+
+    def test_get_explicit_defer(self):
+        # 只撤销管理器默认的延迟加载，显式延迟的大字段保持延迟
+        instance = ExampleModel.objects.defer('description').get(name='example-0')
+        self.assertEqual({'description'}, instance.get_deferred_fields())
+        instance = ExampleModel.objects.defer('title').get(name='example-0')
+        self.assertEqual({'title'}, instance.get_deferred_fields())
+        instance = ExampleModel.objects.defer('description').only('name', 'description').get(name='example-0')
+        self.assertIn('description', instance.get_deferred_fields())
+        self.assertEqual(set(), ExampleModel.objects.defer(None).get(name='example-0').get_deferred_fields())
+        self.assertEqual(set(), ChildModel.objects.get().get_deferred_fields())
+        self.assertEqual({'readme'}, ChildModel.objects.defer('readme').get().get_deferred_fields())
+
+    def test_lazy_load_warning(self):
+        deferred_field_loads.clear()
+        instance = ExampleModel.objects.all()[0]
+        with self.assertWarns(DeferredFieldLoadWarning), self.assertNumQueries(1):
+            self.assertEqual('description', instance.description)
+        self.assertEqual(1, deferred_field_loads['tests.ExampleModel.description'])
+
+    def test_polymorphic(self):
+        self.assertEqual('readme', ChildModel.objects.get().readme)
+        instance = ChildModel.objects.all()[0]
+        self.assertEqual({'readme'}, instance.get_deferred_fields())
+        with self.assertWarns(DeferredFieldLoadWarning):
+            self.assertEqual('readme', instance.readme)
+        self.assertEqual('readme', ChildModel.objects.with_large_fields()[0].readme)
+
+
+class BulkUpsertTestCase(TestCase):
+    def test_insert(self):
+        objs = ExampleModel.objects.bulk_upsert([ExampleModel(name=f'example-{index}') for index in range(3)])
+        self.assertEqual([1, 2, 3], [obj.number for obj in objs])
+        saved = ExampleModel.objects.order_by('number')
+        self.assertEqual([obj.pk for obj in objs], [obj.pk for obj in saved])
+        self.assertTrue(all(obj.created_at and obj.updated_at for obj in saved))
+
+    def test_update_conflicts(self):
+        existing = ExampleModel.objects.create(name='example-0', title='before')
+        objs = ExampleModel.objects.bulk_upsert([
+            ExampleModel(name='example-0', title='after'),
+            ExampleModel(name='example-1', title='new'),
+        ])
+        self.assertEqual(2, ExampleModel.objects.count())
+        self.assertEqual((existing.pk, existing.number, existing.created_at),
+                         (objs[0].pk, objs[0].number, objs[0].created_at))
+        saved = ExampleModel.objects.get(name='example-0')
+        self.assertEqual('after', saved.title)
+        self.assertGreater(saved.updated_at, existing.updated_at)
+        self.assertEqual(ExampleModel.objects.get(name='example-1').pk, objs[1].pk)
+
+    def test_duplicates(self):
+        objs = ExampleModel.objects.bulk_upsert([ExampleModel(name='example', title=title) for title in 'ab'])
+        self.assertEqual('b', ExampleModel.objects.get().title)
+        self.assertEqual(objs[0].pk, objs[1].pk)
+
+    def test_queries_per_chunk(self):
+        ExampleModel.objects.create(name='example')
+
+        def upsert(count):
+            with CaptureQueriesContext(connection) as context:
+                ExampleModel.objects.bulk_upsert(
+                    [ExampleModel(name=f'example-{index}') for index in range(count)], batch_size=20)
+            return len(context)
+
+        per_chunk = upsert(20)
+        self.assertEqual(per_chunk * 3, upsert(60))
+
+    def test_bulk_update(self):
+        objs = [ExampleModel.objects.create(name=f'example-{index}') for index in range(2)]
+        updated_at = [obj.updated_at for obj in objs]
+        for obj in objs:
+            obj.title = 'changed'
+        ExampleModel.objects.bulk_update(objs, ['title'])
+        for obj, before in zip(ExampleModel.objects.order_by('number'), updated_at):
+            self.assertEqual('changed', obj.title)
+            self.assertGreater(obj.updated_at, before)
@@ -1,8 +1,11 @@
 import uuid
 import datetime
+import warnings
 
+from django.db import connection, transaction
 from django.test import TestCase
-from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.db.utils import DatabaseError, IntegrityError
 
 from tests.models import (
     ExampleModel
@@ -53,3 +56,95 @@ class ModelTestCase(TestCase):
         example.name = 'updated-example'
         example.save()
         self.assertLessEqual(example.updated_at - example.created_at, datetime.timedelta(seconds=1))
+
+
+class DirtyFieldsTestCase(TestCase):
+    def setUp(self):
+        ExampleModel.objects.create(name='example', description='An example instance')
+        self.example = ExampleModel.objects.get(name='example')
+
+    def test_dirty_fields(self):
+        self.assertEqual([], self.example.get_dirty_fields())
+        self.example.status = 'published'
+        self.assertEqual(['status'], self.example.get_dirty_fields())
+        self.assertIn('status', ExampleModel(name='new').get_dirty_fields())
+
+    def test_save_changed_fields(self):
+        updated_at = self.example.updated_at
+        self.example.status = 'published'
+        with CaptureQueriesContext(connection) as context:
+            self.example.save()
+        sql = context.captured_queries[-1]['sql']
+        self.assertIn('"status"', sql)
+        self.assertIn('"updated_at"', sql)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"title"', sql)
+        saved = ExampleModel.objects.get(pk=self.example.pk)
+        self.assertEqual('published', saved.status)
+        self.assertGreater(saved.updated_at, updated_at)
+        self.assertEqual([], self.example.get_dirty_fields())
+
+    def test_skip_unchanged(self):
+        with self.assertNumQueries(0):
+            self.example.save()
+        self.example.status = 'published'
+        self.example.status = 'draft'
+        with self.assertNumQueries(0):
+            self.example.save()
+
+    def test_deferred_field(self):
+        # 延迟加载后修改的字段同样被追踪
+        self.example.description = 'changed'
+        self.assertEqual(['description'], self.example.get_dirty_fields())
+        example = ExampleModel.objects.all()[0]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            example.description
+        example.description = 'changed'
+        example.save()
+        self.assertEqual('changed', ExampleModel.objects.get(pk=example.pk).description)
+
+    def test_deferred_field_assigned_without_read(self):
+        # 未读取延迟加载的字段就赋值
+        example = ExampleModel.objects.defer('title', 'description').get(pk=self.example.pk)
+        example.title = 'changed title'
+        example.description = 'changed'
+        self.assertEqual(['title', 'description'], example.get_dirty_fields())
+        example.save()
+        saved = ExampleModel.objects.with_large_fields().get(pk=example.pk)
+        self.assertEqual(('changed title', 'changed'), (saved.title, saved.description))
+        example = ExampleModel.objects.all()[0]
+        example.description = 'changed again'
+        example.save()
+        self.assertEqual('changed again', ExampleModel.objects.get(pk=example.pk).description)
+
+    def test_large_field_snapshot(self):
+        # 大字段只记录摘要
+        self.assertNotEqual(self.example.description, self.example._loaded_values['description'])
+        self.example.description = 'An example instance'
+        self.assertEqual([], self.example.get_dirty_fields())
+
+    def test_deleted_row(self):
+        # 行已被删除时与Django默认的save一致重新插入
+        example = ExampleModel.objects.with_large_fields().get(pk=self.example.pk)
+        ExampleModel.objects.filter(pk=example.pk).delete()
+        example.status = 'published'
+        with transaction.atomic():
+            example.save()
+        saved = ExampleModel.objects.get(pk=example.pk)
+        self.assertEqual(('example', 'published', 'An example instance'), (saved.name, saved.status, saved.description))
+        self.assertEqual([], example.get_dirty_fields())
+        # 有延迟加载的字段时无法重新插入
+        example = ExampleModel.objects.defer('description').get(pk=example.pk)
+        ExampleModel.objects.filter(pk=example.pk).delete()
+        example.status = 'archived'
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            example.save()
+
+    def test_explicit_update_fields(self):
+        self.example.title = 'title'
+        self.example.status = 'published'
+        self.example.save(update_fields=['title'])
+        self.assertEqual(['status'], self.example.get_dirty_fields())
+        saved = ExampleModel.objects.get(pk=self.example.pk)
+        self.assertEqual(('title', 'draft'), (saved.title, saved.status))
@@ -0,0 +1,114 @@
+import uuid
+
+from django.db import connection, migrations
+from django.db.migrations.state import ProjectState
+from django.test import TransactionTestCase
+
+from django_quanttide.models import IDField, StatusField
+from django_quanttide.models.operations import AlterIDFieldToBinary, AlterChoicesToCompact
+
+
+class OperationTestCase(TransactionTestCase):
+    app_label = ''
+
+    def apply(self, operation, state, backwards=False):
+        new_state = state.clone()
+        operation.state_forwards(self.app_label, new_state)
+        with connection.schema_editor() as editor:
+            if backwards:
+                operation.database_backwards(self.app_label, editor, new_state, state)
+            else:
+                operation.database_forwards(self.app_label, editor, state, new_state)
+        return new_state
+
+
+class AlterIDFieldToBinaryTestCase(OperationTestCase):
+    app_label = 'test_binary_id'
+
+    def test_forwards_backwards(self):
+        state = self.apply(migrations.CreateModel('Pony', [
+            ('id', IDField()),
+            ('related_id', IDField(primary_key=False)),
+        ]), ProjectState())
+        pk, related_id = uuid.uuid4(), uuid.uuid4()
+        state.apps.get_model(self.app_label, 'Pony').objects.create(id=pk, related_id=related_id)
+
+        operations = [
+            AlterIDFieldToBinary('Pony', 'id', IDField(binary=True)),
+            AlterIDFieldToBinary('Pony', 'related_id', IDField(primary_key=False, binary=True)),
+        ]
+        states = [state]
+        for operation in operations:
+            states.append(self.apply(operation, states[-1]))
+        binary_state = states[-1]
+        pony = binary_state.apps.get_model(self.app_label, 'Pony').objects.get(related_id=related_id)
+        self.assertEqual(pk, pony.pk)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT id, related_id FROM test_binary_id_pony')
+            self.assertEqual((pk.bytes, related_id.bytes), cursor.fetchone())
+
+        for operation, previous_state in reversed(list(zip(operations, states))):
+            self.apply(operation, previous_state, backwards=True)
+        pony = state.apps.get_model(self.app_label, 'Pony').objects.get(related_id=related_id)
+        self.assertEqual(pk, pony.pk)
+
+        with connection.schema_editor() as editor:
+            editor.delete_model(state.apps.get_model(self.app_label, 'Pony'))
+
+
+class AlterChoicesToCompactTestCase(OperationTestCase):
+    app_label = 'test_compact_choices'
+    choices = [('draft', 'Draft'), ('published', 'Published'), ('archived', 'Archived')]
+
+    def test_forwards_backwards(self):
+        state = self.apply(migrations.CreateModel('Pony', [
+            ('id', IDField()),
+            ('status', StatusField(choices=self.choices, default='draft')),
+        ]), ProjectState())
+        Pony = state.apps.get_model(self.app_label, 'Pony')
+        Pony.objects.create(status='draft')
+        Pony.objects.create(status='archived')
+
+        operation = AlterChoicesToCompact('Pony', 'status', StatusField(choices=self.choices, default='draft',
+                                                                        compact=True))
+        compact_state = self.apply(operation, state)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT status FROM test_compact_choices_pony ORDER BY status')
+            self.assertEqual([(1,), (3,)], cursor.fetchall())
+        Pony = compact_state.apps.get_model(self.app_label, 'Pony')
+        self.assertEqual(['archived', 'draft'], sorted(Pony.objects.values_list('status', flat=True)))
+
+        self.apply(operation, state, backwards=True)
+        Pony = state.apps.get_model(self.app_label, 'Pony')
+        self.assertEqual(['archived', 'draft'], sorted(Pony.objects.values_list('status', flat=True)))
+
+        with connection.schema_editor() as editor:
+            editor.delete_model(Pony)
+
+    def test_digit_choices(self):
+        # 选项值与编码同为数字文本，'2'和'1'的编码分别为1和2
+        choices = [('2', 'Two'), ('1', 'One')]
+        state = self.apply(migrations.CreateModel('Pony', [
+            ('id', IDField()),
+            ('status', StatusField(choices=choices, default='1')),
+        ]), ProjectState())
+        Pony = state.apps.get_model(self.app_label, 'Pony')
+        Pony.objects.create(status='1')
+        Pony.objects.create(status='2')
+        Pony.objects.create(status='2')
+
+        operation = AlterChoicesToCompact('Pony', 'status', StatusField(choices=choices, default='1', compact=True))
+        compact_state = self.apply(operation, state)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT status FROM test_compact_choices_pony ORDER BY status')
+            self.assertEqual([(1,), (1,), (2,)], cursor.fetchall())
+        Pony = compact_state.apps.get_model(self.app_label, 'Pony')
+        # 按编码排序
+        self.assertEqual(['2', '2', '1'], list(Pony.objects.order_by('status').values_list('status', flat=True)))
+
+        self.apply(operation, state, backwards=True)
+        Pony = state.apps.get_model(self.app_label, 'Pony')
+        self.assertEqual(['1', '2', '2'], sorted(Pony.objects.values_list('status', flat=True)))
+
+        with connection.schema_editor() as editor:
+            editor.delete_model(Pony)
@@ -1,5 +1,9 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
+from django_quanttide import models
 from tests.models import ParentModel, ChildModel
 
 
@@ -15,3 +19,54 @@ class PolymorphicModelTestCase(TestCase):
     def test_child_model_type(self):
         print(self.child_instance.__class__.__name__)
         self.assertEqual('childmodel', self.child_instance.type)
+
+    def test_unsaved_type(self):
+        self.assertEqual('childmodel', ChildModel().type)
+
+    def test_type_queries(self):
+        ContentType.objects.clear_cache()
+        instances = list(ParentModel.objects.non_polymorphic())
+        # 每种类型只查询一次ContentType
+        with self.assertNumQueries(2):
+            self.assertEqual(['childmodel', 'parentmodel'], sorted(instance.type for instance in instances))
+        with self.assertNumQueries(0):
+            self.assertEqual(['childmodel', 'parentmodel'], sorted(instance.type for instance in instances))
+
+
+class PolymorphicDirtyFieldsTestCase(TestCase):
+    def test_save_changed_fields(self):
+        child = ChildModel.objects.create(readme='readme')
+        instance = ParentModel.objects.with_large_fields().get(pk=child.pk)
+        with self.assertNumQueries(0):
+            instance.save()
+        instance.readme = 'changed'
+        self.assertEqual(['readme'], instance.get_dirty_fields())
+        instance.save()
+        self.assertEqual('changed', ChildModel.objects.get(pk=child.pk).readme)
+
+
+class PolymorphicOfTypeTestCase(TestCase):
+    def setUp(self):
+        self.instance = ParentModel.objects.create()
+        self.child_instance = ChildModel.objects.create()
+
+    def test_of_type(self):
+        self.assertEqual([self.child_instance], list(ParentModel.objects.of_type('childmodel')))
+        # 只匹配类型本身，不包括子类
+        self.assertEqual([self.instance.pk], list(ParentModel.objects.of_type('parentmodel').values_list('pk', flat=True)))
+        self.assertEqual(2, ParentModel.objects.of_type('parentmodel', 'childmodel').count())
+
+    def test_of_type_without_join(self):
+        ParentModel.objects.of_type('childmodel').count()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(1, ParentModel.objects.non_polymorphic().of_type('childmodel').count())
+        self.assertEqual(1, len(queries))
+        self.assertNotIn('django_content_type', queries[0]['sql'])
+
+    def test_of_type_unknown(self):
+        with self.assertRaises(ValueError):
+            ChildModel.objects.of_type('parentmodel')
+
+    def test_polymorphic_type_index(self):
+        index = models.polymorphic_type_index('parent_type_idx')
+        self.assertEqual(['polymorphic_ctype', 'created_at'], index.fields)
@@ -0,0 +1,82 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from django_quanttide.pagination import KeysetPagination
+
+from tests.models import ExampleModel, ExampleNumberModel
+
+
+class KeysetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ExampleModel.objects.bulk_create([ExampleModel(name=f'example-{index}') for index in range(25)])
+        start = datetime.datetime(2024, 1, 1)
+        # 每三行使用相同的创建时间，覆盖键值相同时按ID排序的情况
+        for index, pk in enumerate(ExampleModel.objects.values_list('pk', flat=True)):
+            ExampleModel.objects.filter(pk=pk).update(created_at=start + datetime.timedelta(minutes=index // 3))
+        cls.expected = list(ExampleModel.objects.order_by('created_at', 'id'))
+
+    def paginate(self, size, descending=False):
+        objects, cursor = [], None
+        while True:
+            page = ExampleModel.objects.keyset(cursor, size=size, descending=descending)
+            objects.extend(page.objects)
+            if page.next_cursor is None:
+                return objects
+            cursor = page.next_cursor
+
+    def test_keyset(self):
+        self.assertEqual(self.expected, self.paginate(10))
+        self.assertEqual(self.expected, self.paginate(3))
+        self.assertEqual(self.expected[::-1], self.paginate(4, descending=True))
+
+    def test_page_queries(self):
+        page = ExampleModel.objects.keyset(size=10)
+        page = ExampleModel.objects.keyset(page.next_cursor, size=10)
+        with self.assertNumQueries(1):
+            ExampleModel.objects.keyset(page.next_cursor, size=10)
+
+    def test_invalid_cursor(self):
+        for cursor in ['invalid', 'WyJhIl0', 'WyJhIiwgImIiXQ']:
+            with self.assertRaises(ValueError):
+                ExampleModel.objects.keyset(cursor)
+
+    def test_without_created_at(self):
+        ExampleNumberModel.objects.bulk_create([ExampleNumberModel() for _ in range(5)])
+        page = ExampleNumberModel.objects.keyset(size=3)
+        page2 = ExampleNumberModel.objects.keyset(page.next_cursor, size=3)
+        self.assertEqual(
+            list(ExampleNumberModel.objects.order_by('id')),
+            page.objects + page2.objects,
+        )
+
+
+class KeysetPaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(5):
+            ExampleModel.objects.create(name=f'example-{index}')
+
+    def paginate(self, params):
+        pagination = KeysetPagination()
+        request = Request(APIRequestFactory().get('/examples/', params))
+        objects = pagination.paginate_queryset(ExampleModel.objects.all(), request)
+        return objects, pagination.get_paginated_response([instance.name for instance in objects]).data
+
+    def test_paginate(self):
+        objects, data = self.paginate({'page_size': 3})
+        self.assertEqual(3, len(data['results']))
+        self.assertIn('cursor=', data['next'])
+        cursor = data['next'].split('cursor=')[1].split('&')[0]
+        next_objects, next_data = self.paginate({'page_size': 3, 'cursor': cursor})
+        self.assertEqual(2, len(next_data['results']))
+        self.assertIsNone(next_data['next'])
+        self.assertEqual(list(ExampleModel.objects.order_by('-created_at', '-id')), objects + next_objects)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(NotFound):
+            self.paginate({'cursor': 'invalid'})
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+from rest_framework import serializers
+
+from django_quanttide.models import StageChoices
+from django_quanttide.serializers.fields import ChoiceLabelField
+
+from tests.models import ExampleModel
+
+
+class ExampleModelSerializer(serializers.ModelSerializer):
+    serializer_choice_field = ChoiceLabelField
+
+    class Meta:
+        model = ExampleModel
+        fields = ['type', 'status', 'stage']
+
+
+class ChoiceLabelFieldTestCase(SimpleTestCase):
+    def test_to_representation(self):
+        instance = ExampleModel(type='movie', status='published', stage=StageChoices.BETA)
+        self.assertEqual({
+            'type': {'value': 'movie', 'label': 'Movie'},
+            'status': {'value': 'published', 'label': 'Published'},
+            'stage': {'value': 4, 'label': '公测'},
+        }, ExampleModelSerializer(instance).data)
+
+    def test_to_internal_value(self):
+        serializer = ExampleModelSerializer(data={'type': {'value': 'music', 'label': 'Music'}, 'status': 'archived'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual('music', serializer.validated_data['type'])
+        self.assertEqual('archived', serializer.validated_data['status'])
+        field = ChoiceLabelField(choices=[('book', 'Book')])
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value({'value': 'game'})
@@ -0,0 +1,64 @@
+from django.test import TestCase
+from rest_framework import serializers
+
+from django_quanttide.serializers.polymorphic import PolymorphicListSerializer
+
+from tests.models import ParentModel, ChildModel
+from tests.serializers import ExamplePolymorphicSerializer, BaseExamplePolymorphicSerializer
+
+
+class PolymorphicSerializerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for _ in range(3):
+            ParentModel.objects.create()
+            ChildModel.objects.create()
+
+    def test_to_representation(self):
+        instance = ChildModel.objects.first()
+        self.assertEqual(
+            BaseExamplePolymorphicSerializer(instance).data,
+            ExamplePolymorphicSerializer(instance).data,
+        )
+        self.assertEqual('ChildModel', ExamplePolymorphicSerializer(instance).data['resourcetype'])
+
+    def test_many(self):
+        queryset = ParentModel.objects.order_by('id')
+        serializer = ExamplePolymorphicSerializer(queryset, many=True)
+        self.assertIsInstance(serializer, PolymorphicListSerializer)
+        self.assertEqual(BaseExamplePolymorphicSerializer(queryset, many=True).data, serializer.data)
+        self.assertEqual(
+            ['ChildModel'] * 3 + ['ParentModel'] * 3,
+            sorted(item['resourcetype'] for item in serializer.data),
+        )
+        # 列表参数交给列表序列化器，其余参数交给子序列化器
+        serializer = ExamplePolymorphicSerializer(queryset, many=True, allow_empty=False, partial=True)
+        self.assertIs(PolymorphicListSerializer, type(serializer))
+        self.assertFalse(serializer.allow_empty)
+        self.assertTrue(serializer.child.partial)
+
+    def test_many_with_meta(self):
+        # 子类声明自己的Meta时仍使用多态列表序列化器
+        class MetaSerializer(ExamplePolymorphicSerializer):
+            class Meta:
+                ref_name = 'example'
+
+        class CustomListSerializer(serializers.ListSerializer):
+            pass
+
+        class CustomListMetaSerializer(ExamplePolymorphicSerializer):
+            class Meta:
+                list_serializer_class = CustomListSerializer
+
+        queryset = ParentModel.objects.order_by('id')
+        serializer = MetaSerializer(queryset, many=True)
+        self.assertIsInstance(serializer, PolymorphicListSerializer)
+        self.assertEqual(ExamplePolymorphicSerializer(queryset, many=True).data, serializer.data)
+        self.assertIs(CustomListSerializer, type(CustomListMetaSerializer(queryset, many=True)))
+
+    def test_dispatch_cache(self):
+        list(ExamplePolymorphicSerializer(ParentModel.objects.all(), many=True).data)
+        self.assertEqual(
+            (ChildModel, 'ChildModel'),
+            ExamplePolymorphicSerializer._dispatch_cache[ChildModel],
+        )
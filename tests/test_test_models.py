@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from django.test import TestCase
+
+from django_quanttide.test import models as test_models
+
+from tests.models import ExampleModel, ExampleNumberModel
+
+
+class ExampleModelTestCase(test_models.ModelTestCase):
+    model_class = ExampleModel
+    model_data = {'name': 'example', 'title': 'Example Model'}
+    # SAVEPOINT、UPDATE、SELECT、RELEASE SAVEPOINT、INSERT
+    max_save_queries = 5
+    max_get_queries = 1
+    max_save_seconds = 1.0
+    seed_rows = 200
+
+    def test_seed_data(self):
+        self.assertEqual({'name': 'example-3', 'title': 'Example Model'}, self.get_seed_data(3))
+
+
+class ExampleNumberModelTestCase(test_models.ModelTestCase):
+    model_class = ExampleNumberModel
+    # 编号分配与已有行数无关
+    seed_sizes = (10, 200)
+
+
+class ModelTestCaseBudgetTestCase(TestCase):
+    def test_budget_exceeded(self):
+        class TightBudgetTestCase(test_models.ModelTestCase):
+            model_class = ExampleNumberModel
+            max_save_queries = 1
+            seed_rows = 10
+
+        result = unittest.TestResult()
+        unittest.TestSuite([TightBudgetTestCase('test_budgets')]).run(result)
+        self.assertEqual(1, len(result.failures))
+        self.assertIn('save() executed 5 queries with 10 existing rows', result.failures[0][1])
+
+
+class ModelTestCaseScalingTestCase(TestCase):
+    class ScalingTestCase(test_models.ModelTestCase):
+        model_class = ExampleNumberModel
+        seed_sizes = (10, 50)
+        scaling_repeats = 2
+        max_seconds_growth = None
+
+    def run_case(self, case):
+        result = unittest.TestResult()
+        unittest.TestSuite([case]).run(result)
+        return result
+
+    def test_flat(self):
+        case = self.ScalingTestCase('test_seed_scaling')
+        self.assertTrue(self.run_case(case).wasSuccessful())
+        self.assertEqual([10, 50], [entry['size'] for entry in case.seed_scaling])
+        self.assertEqual(case.seed_scaling[0]['save_queries'], case.seed_scaling[1]['save_queries'])
+
+    def test_growing_save(self):
+        save = ExampleNumberModel.save
+
+        def scanning_save(instance, *args, **kwargs):
+            # 每次保存逐行查询整张表
+            for pk in ExampleNumberModel.objects.values_list('pk', flat=True):
+                ExampleNumberModel.objects.filter(pk=pk).exists()
+            return save(instance, *args, **kwargs)
+
+        with mock.patch.object(ExampleNumberModel, 'save', scanning_save):
+            result = self.run_case(self.ScalingTestCase('test_seed_scaling'))
+        self.assertEqual(1, len(result.failures))
+        message = result.failures[0][1]
+        self.assertIn('save() queries grew from', message)
+        self.assertIn('at 50 rows. Repeated statements:', message)
+        self.assertIn('x SELECT ? AS "a" FROM "tests_examplenumbermodel"', message)
+        self.assertNotIn('SAVEPOINT', message)
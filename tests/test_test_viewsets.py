@@ -0,0 +1,59 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from django_quanttide.test import viewsets as test_viewsets
+
+from tests.models import ExampleModel, ExampleAuditModel
+from tests.serializers import ExampleModelSerializer, ExampleAuditModelSerializer
+
+
+class ExampleModelViewSetTestCase(test_viewsets.ViewSetAPITestCase):
+    app_name = 'tests'
+    router_basename = 'example'
+    model_class = ExampleModel
+    serializer_class = ExampleModelSerializer
+    lookup_kwargs = {'name': 'example'}
+    scaling_sizes = (10, 50)
+    list_row_data = {'name': 'example'}
+    max_list_seconds_per_row = 0.1
+
+    @classmethod
+    def setUpTestData(cls):
+        ExampleModel.objects.create(name='example')
+        super().setUpTestData()
+
+    def test_list_scaling(self):
+        super().test_list_scaling()
+        self.assertEqual([10, 50], [measurement['size'] for measurement in self.list_scaling])
+        self.assertEqual(1, len({measurement['queries'] for measurement in self.list_scaling}))
+
+
+class ViewSetAPITestCaseScalingTestCase(TestCase):
+    def test_n_plus_one(self):
+        class AuditViewSetTestCase(test_viewsets.ViewSetAPITestCase):
+            app_name = 'tests'
+            router_basename = 'audit'
+            model_class = ExampleAuditModel
+            serializer_class = ExampleAuditModelSerializer
+            lookup_kwargs = {'name': 'example'}
+            scaling_sizes = (10, 20)
+            list_row_data = {'name': 'example'}
+
+            @classmethod
+            def setUpTestData(cls):
+                cls.user = get_user_model().objects.create(username='alice')
+                ExampleAuditModel.objects.create(name='example', created_by=cls.user)
+                super().setUpTestData()
+
+            def seed_list(self, count):
+                super().seed_list(count)
+                ExampleAuditModel.objects.update(created_by=self.user)
+
+        result = unittest.TestResult()
+        unittest.TestSuite([AuditViewSetTestCase('test_list_scaling')]).run(result)
+        self.assertEqual(1, len(result.failures))
+        message = result.failures[0][1]
+        self.assertIn('list queries grew from 11 at 10 rows to 21 at 20 rows', message)
+        self.assertIn('20x SELECT "auth_user"', message)
@@ -0,0 +1,12 @@
+from django.urls import include, path
+from rest_framework import routers
+
+from tests import views
+
+router = routers.SimpleRouter()
+router.register('examples', views.ExampleModelViewSet, basename='example')
+router.register('audits', views.ExampleAuditModelViewSet, basename='audit')
+
+urlpatterns = [
+    path('', include((router.urls, 'tests'))),
+]
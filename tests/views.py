@@ -0,0 +1,17 @@
+from rest_framework import viewsets
+
+from tests.models import ExampleModel, ExampleAuditModel
+from tests.serializers import ExampleModelSerializer, ExampleAuditModelSerializer
+
+
+class ExampleModelViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ExampleModel.objects.all()
+    serializer_class = ExampleModelSerializer
+    lookup_field = 'name'
+
+
+class ExampleAuditModelViewSet(viewsets.ReadOnlyModelViewSet):
+    # 取消默认的关联查询，模拟序列化审计用户时的N+1查询
+    queryset = ExampleAuditModel.objects.select_related(None)
+    serializer_class = ExampleAuditModelSerializer
+    lookup_field = 'name'